@@ -0,0 +1,90 @@
+"""
+Microbenchmark: splitting of Log-Lines, the strptime-based parse_line as it was
+(UTC and local datetime) against the fixed-offset split_line (UTC epoch-seconds).
+
+    python tools/bench_parse_line.py [number of lines]
+"""
+import calendar
+import datetime
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from vi.chat.messageparser import MessageParserException, split_line  # noqa: E402
+
+
+def parse_line_strptime(line: str) -> tuple:
+    """the previous implementation, for comparison"""
+    time_start = line.find("[") + 1
+    time_ends = line.find("]")
+    time_str = line[time_start:time_ends].strip()
+    try:
+        utc_timestamp = datetime.datetime.strptime(time_str, "%Y.%m.%d %H:%M:%S")
+    except ValueError:
+        raise MessageParserException("Invalid Timestamp in Line: %s" % (line,))
+    timestamp = (
+        utc_timestamp.replace(tzinfo=datetime.timezone.utc)
+        .astimezone(tz=None)
+        .replace(tzinfo=None)
+    )
+    user_ends = line.find(">")
+    username = line[time_ends + 1 : user_ends].strip()
+    text = line[user_ends + 1 :].strip()
+    return utc_timestamp, username, text, timestamp
+
+
+def sample_lines(count: int) -> list:
+    start = datetime.datetime(2019, 11, 30, 12, 0, 0)
+    lines = []
+    for i in range(count):
+        if i % 20 == 19:
+            # continuation of a multi-line message
+            lines.append("and another line of the same message")
+            continue
+        stamp = (start + datetime.timedelta(seconds=i)).strftime("%Y.%m.%d %H:%M:%S")
+        lines.append("[ %s ] Some Pilot %d > 1DQ1-A nv +3 red %d" % (stamp, i % 7, i))
+    return lines
+
+
+def run_old(lines: list):
+    for line in lines:
+        try:
+            parse_line_strptime(line)
+        except MessageParserException:
+            pass
+
+
+def run_new(lines: list):
+    for line in lines:
+        split_line(line)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lines = sample_lines(count)
+    for line in lines:
+        try:
+            utc_timestamp, username, text, timestamp = parse_line_strptime(line)
+            expected = (
+                float(calendar.timegm(utc_timestamp.timetuple())),
+                username,
+                text,
+            )
+        except MessageParserException:
+            expected = None
+        if split_line(line) != expected:
+            print("MISMATCH: %r" % (line,))
+            return 1
+    old = min(timeit.repeat(lambda: run_old(lines), number=1, repeat=5))
+    new = min(timeit.repeat(lambda: run_new(lines), number=1, repeat=5))
+    print("%d lines" % count)
+    print("  parse_line (strptime):   %8.2f us/line" % (old / count * 1e6))
+    print("  split_line (fixed):      %8.2f us/line" % (new / count * 1e6))
+    print("  speedup:                 %8.1fx" % (old / new))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -252,6 +252,117 @@ class Cache(object):
             self.LOGGER.error("Cache-Error delete_avatar: %s" % (name,), e)
             raise CacheWriteError(e)
 
+    def put_log_index(
+        self,
+        path: str,
+        inode: int,
+        size: int,
+        mtime: float,
+        charname: str,
+        room: str,
+        session_start: float,
+        offset: int,
+    ):
+        """
+        Store how far a Chat-Log has been processed, together with its header-information
+        """
+        with Cache.SQLITE_WRITE_LOCK:
+            try:
+                query = (
+                    "INSERT OR REPLACE INTO logindex (path, inode, size, mtime, charname, room, "
+                    "session_start, offset, modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                )
+                self.con.execute(
+                    query,
+                    (
+                        path,
+                        inode,
+                        size,
+                        mtime,
+                        charname,
+                        room,
+                        session_start,
+                        offset,
+                        time.time(),
+                    ),
+                )
+                self.con.commit()
+            except Exception as e:
+                self.LOGGER.error("Cache-Error put_log_index: %s" % (path,), e)
+                raise CacheWriteError(e)
+
+    def get_log_index(self, path: str) -> dict:
+        """
+        Getting back the stored processing state of a Chat-Log. Returns None if the
+        Log was never processed
+        """
+        try:
+            query = (
+                "SELECT inode, size, mtime, charname, room, session_start, offset "
+                "FROM logindex WHERE path = ?"
+            )
+            founds = self.con.execute(query, (path,)).fetchall()
+        except Exception as e:
+            self.LOGGER.error("Cache-Error get_log_index: %s" % (path,), e)
+            raise CacheReadError(e)
+        if len(founds) == 0:
+            return None
+        keys = ("inode", "size", "mtime", "charname", "room", "session_start", "offset")
+        return dict(zip(keys, founds[0]))
+
+    def prune_log_index(self, max_age: int):
+        """
+        Removing the entries of Chat-Logs not processed within max_age seconds
+        """
+        try:
+            with Cache.SQLITE_WRITE_LOCK:
+                query = "DELETE FROM logindex WHERE modified < ?"
+                self.con.execute(query, (time.time() - max_age,))
+                self.con.commit()
+        except Exception as e:
+            self.LOGGER.error("Cache-Error prune_log_index", e)
+            raise CacheWriteError(e)
+
+    def put_not_characters(self, names: list):
+        """
+        Remember names ESI doesn't know as Character
+        """
+        with Cache.SQLITE_WRITE_LOCK:
+            try:
+                query = "INSERT OR REPLACE INTO notcharacters (name, modified) VALUES (?, ?)"
+                now = time.time()
+                self.con.executemany(query, [(name, now) for name in names])
+                self.con.commit()
+            except Exception as e:
+                self.LOGGER.error("Cache-Error put_not_characters: %r" % (names,), e)
+                raise CacheWriteError(e)
+
+    def get_not_characters(self, max_age: int) -> dict:
+        """
+        Getting back the names known not to be a Character, stored within max_age seconds
+        :return: dict {name: time stored}
+        """
+        try:
+            query = "SELECT name, modified FROM notcharacters WHERE modified >= ?"
+            founds = self.con.execute(query, (time.time() - max_age,)).fetchall()
+        except Exception as e:
+            self.LOGGER.error("Cache-Error get_not_characters", e)
+            raise CacheReadError(e)
+        return dict(founds)
+
+    def prune_not_characters(self, max_age: int):
+        """
+        Removing the names stored longer than max_age seconds ago
+        """
+        try:
+            with Cache.SQLITE_WRITE_LOCK:
+                query = "DELETE FROM notcharacters WHERE modified < ?"
+                self.con.execute(query, (time.time() - max_age,))
+                self.con.commit()
+        except Exception as e:
+            self.LOGGER.error("Cache-Error prune_not_characters", e)
+            raise CacheWriteError(e)
+
     def put_jumpbridge_data(self, data: list):
         with Cache.SQLITE_WRITE_LOCK:
             try:
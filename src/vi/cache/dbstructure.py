@@ -48,6 +48,17 @@ def updateDatabase(oldVersion, con):
             "CREATE TABLE cache (key VARCHAR PRIMARY KEY, data BLOB, modified INT, maxage INT)",
             "UPDATE version SET version = 3",
         ]
+    if oldVersion < 4:
+        queries += [
+            "CREATE TABLE logindex (path VARCHAR PRIMARY KEY, inode INT, size INT, mtime REAL, charname VARCHAR, "
+            "room VARCHAR, session_start REAL, offset INT, modified INT)",
+            "UPDATE version SET version = 4",
+        ]
+    if oldVersion < 5:
+        queries += [
+            "CREATE TABLE notcharacters (name VARCHAR PRIMARY KEY, modified INT)",
+            "UPDATE version SET version = 5",
+        ]
     for query in queries:
         con.execute(query)
     for update in databaseUpdates:
@@ -0,0 +1,224 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import datetime
+import json
+import logging
+import os
+import stat
+import time
+import zipfile
+
+from vi.chat.logreader import LogTailReader
+from vi.chat.messageparser import split_line
+
+TIME_FORMAT = "%Y.%m.%d %H:%M:%S"
+
+
+class LogArchiver:
+    """moves old chat-logs out of the watched folder.
+
+    The logs are stored in one zip-file per day (of the session start) in a
+    folder next to the Chatlogs, i.e. "Chatlogs-archive/2019.11.30.zip".
+    The index (index.json) holds room, character and time-range of each log.
+    """
+
+    INDEX_NAME = "index.json"
+    # never touch logs younger than this (seconds), they may still be written to
+    MIN_AGE = 60 * 60 * 4
+
+    def __init__(self, folder: str, max_age: int, archive_folder: str = None):
+        """
+        :param folder: the Chatlogs folder
+        :param max_age: archive logs not modified for this long (seconds)
+        :param archive_folder: where the archives go, defaults to "<folder>-archive"
+        """
+        self.LOGGER = logging.getLogger(__name__)
+        self.folder = folder
+        self.max_age = max(max_age, self.MIN_AGE)
+        if not archive_folder:
+            archive_folder = os.path.normpath(folder) + "-archive"
+        self.archive_folder = archive_folder
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.archive_folder, self.INDEX_NAME)
+
+    def entries(self) -> list:
+        """all archived logs
+
+        :return: list of dict (archive, file, room, character, session_start, first, last)
+        """
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            self.LOGGER.error('Unable to read archive-index "%s": %r', self.index_path, e)
+            return []
+
+    def find(self, room: str = None, character: str = None) -> list:
+        return [
+            entry
+            for entry in self.entries()
+            if (room is None or entry["room"] == room)
+            and (character is None or entry["character"] == character)
+        ]
+
+    def read_log(self, entry: dict) -> str:
+        """the content of an archived log
+        """
+        with zipfile.ZipFile(
+            os.path.join(self.archive_folder, entry["archive"]), "r"
+        ) as archive:
+            data = archive.read(entry["file"])
+        return data.decode(LogTailReader.ENCODING).lstrip(LogTailReader.BOM)
+
+    def _candidates(self, now: float) -> list:
+        candidates = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    continue
+                if not stat.S_ISREG(entry_stat.st_mode):
+                    continue
+                if not entry.name.lower().endswith(".txt"):
+                    continue
+                if now - entry_stat.st_mtime > self.max_age:
+                    candidates.append(entry.path)
+        return candidates
+
+    def _log_info(self, path: str) -> dict:
+        """room, character and time-range of a log, None if it isn't a chat-log
+        """
+        reader = LogTailReader(path)
+        character = session_start = None
+        header_end = 0
+        for next_start, line in reader.head_lines():
+            if "Listener:" in line:
+                character = line[line.find(":") + 1 :].strip()
+            elif "Session started:" in line:
+                session_start = line[line.find(":") + 1 :].strip()
+            header_end = next_start
+            if character and session_start:
+                break
+        if not character or not session_start:
+            return None
+        first = last = None
+        for _, line in reader.range_lines(header_end, os.path.getsize(path)):
+            parsed = split_line(line.strip())
+            if parsed is None:
+                continue
+            if first is None:
+                first = parsed[0]
+            last = parsed[0]
+        return {
+            "file": os.path.basename(path),
+            "room": os.path.basename(path)[:-20],
+            "character": character,
+            "session_start": session_start,
+            "first": time.strftime(TIME_FORMAT, time.gmtime(first)) if first else None,
+            "last": time.strftime(TIME_FORMAT, time.gmtime(last)) if last else None,
+        }
+
+    def _write_index(self, entries: list):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(temp_path, self.index_path)
+
+    def archive(self, now: float = None) -> int:
+        """move all logs older than max_age into the archive
+
+        :return: number of logs archived
+        """
+        if now is None:
+            now = time.time()
+        try:
+            candidates = self._candidates(now)
+        except OSError as e:
+            self.LOGGER.error('Unable to scan "%s": %r', self.folder, e)
+            return 0
+        if not candidates:
+            return 0
+        # by archive
+        by_day = {}
+        for path in candidates:
+            try:
+                info = self._log_info(path)
+            except OSError as e:
+                self.LOGGER.warning('Unable to read "%s": %r', path, e)
+                continue
+            if not info:
+                self.LOGGER.debug('Not archiving "%s", not a chat-log', path)
+                continue
+            try:
+                day = datetime.datetime.strptime(info["session_start"], TIME_FORMAT)
+            except (ValueError, KeyError) as e:
+                # garbled header, file it by the day it was last written to
+                self.LOGGER.warning('Unusable session start in "%s": %r', path, e)
+                try:
+                    day = datetime.datetime.utcfromtimestamp(os.path.getmtime(path))
+                except OSError as e:
+                    self.LOGGER.warning('Unable to read "%s": %r', path, e)
+                    continue
+            info["archive"] = day.strftime("%Y.%m.%d") + ".zip"
+            by_day.setdefault(info["archive"], []).append((path, info))
+        if not by_day:
+            return 0
+        os.makedirs(self.archive_folder, exist_ok=True)
+        entries = self.entries()
+        added = archived = 0
+        for archive_name, logs in by_day.items():
+            archive_path = os.path.join(self.archive_folder, archive_name)
+            done = []
+            try:
+                with zipfile.ZipFile(
+                    archive_path, "a", compression=zipfile.ZIP_DEFLATED
+                ) as archive:
+                    names = set(archive.namelist())
+                    for path, info in logs:
+                        # might be in there already, if we got interrupted last time
+                        if info["file"] not in names:
+                            archive.write(path, info["file"])
+                        done.append((path, info))
+            except (OSError, zipfile.BadZipFile) as e:
+                self.LOGGER.error('Unable to write archive "%s": %r', archive_path, e)
+                continue
+            known = {(entry["archive"], entry["file"]) for entry in entries}
+            for path, info in done:
+                if (info["archive"], info["file"]) not in known:
+                    entries.append(info)
+                    added += 1
+                try:
+                    os.remove(path)
+                    archived += 1
+                except OSError as e:
+                    self.LOGGER.warning('Archived "%s", but unable to remove: %r', path, e)
+        if added:
+            self._write_index(entries)
+        if archived:
+            self.LOGGER.info(
+                "Archived %d chat-logs from %s to %s",
+                archived,
+                self.folder,
+                self.archive_folder,
+            )
+        return archived
@@ -0,0 +1,86 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from collections import namedtuple
+
+from vi.chat.logreader import LogTailReader
+from vi.chat.messageparser import MessageParser, split_line
+from vi.dotlan.systemindex import SystemNameIndex
+
+# a parsed Log-Line, as handed back from the child-process
+# timestamp: epoch-seconds (UTC) of the line
+# user: the sender, the Character listening for messages of the EVE-System
+# text: the text of the line, without timestamp and sender
+# status: name of the State
+# systems: names of the systems found
+# spans: the Spans of the systems marked, None for messages of the EVE-System
+BacklogRecord = namedtuple(
+    "BacklogRecord",
+    ("timestamp", "line", "user", "text", "message", "status", "systems", "spans"),
+)
+
+
+def parse_backlog(
+    file_path: str,
+    start: int,
+    end: int,
+    room_name: str,
+    char_name: str,
+    is_local: bool,
+    max_age: int,
+    system_index: SystemNameIndex,
+) -> tuple:
+    """parse the historical part of a Log-File.
+
+    Runs in a child-process, so everything handed in and out has to be picklable.
+    System-Names are resolved to names only, the caller maps them to its Systems.
+
+    :param file_path: the Log-File
+    :param start: byte-offset of the first line to parse
+    :param end: parse the lines starting before this byte-offset
+    :param system_index: names of all Systems on the Map
+    :return: (byte-offset after the last line read, list of BacklogRecord)
+    """
+    parser = MessageParser(room_name, char_name, {}, is_local, max_age)
+    systems = {name: name for name in system_index.names}
+    offset = start
+    records = []
+    for next_start, line in LogTailReader(file_path).range_lines(start, end):
+        offset = next_start
+        line = line.strip()
+        if len(line) <= 2:
+            continue
+        parsed = split_line(line)
+        if parsed is None:
+            continue
+        message = parser.process(line, parsed)
+        if not message:
+            continue
+        parser.process_systems(systems, message, system_index)
+        records.append(
+            BacklogRecord(
+                parsed[0],
+                line,
+                message.user,
+                parsed[2],
+                message.message,
+                message.status.name,
+                list(message.systems),
+                message.rtext.spans if message.rtext is not None else None,
+            )
+        )
+    return offset, records
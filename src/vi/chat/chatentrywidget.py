@@ -16,7 +16,6 @@
 #
 #
 
-import datetime
 import logging
 import sys
 import webbrowser
@@ -87,7 +86,7 @@ class ChatEntryWidget(QtWidgets.QWidget, vi.ui.ChatEntry.Ui_Form):
                 self.textLabel.setToolTip(title)
 
     def updateText(self):
-        time = datetime.datetime.strftime(self.message.timestamp, "%H:%M:%S")
+        time = self.message.local_time.strftime("%H:%M:%S")
         text = u"<small>{time} - <b>{user}</b> - <i>{room}</i></small><br>{text}".format(
             user=self.message.user,
             room=self.message.room,
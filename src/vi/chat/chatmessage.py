@@ -16,9 +16,8 @@
 #
 #
 from vi.states import State
-from bs4 import NavigableString
+from vi.chat.richtext import RichText
 import datetime
-import time
 
 
 class Message(object):
@@ -26,25 +25,21 @@ class Message(object):
         self,
         room: str,
         message: str,
-        timestamp: datetime.datetime,
+        timestamp: float,
         user: str,
         plain_text: str = None,
         status: State = State["ALARM"],
-        rtext: NavigableString = None,
+        rtext: RichText = None,
         currsystems: list = None,
         upper_text: str = None,
         log_line: str = None,
-        utc: datetime.datetime = None,
     ):
         self.room = room  # chatroom the message was posted
         self.message = message  # the messages text
-        self.timestamp = timestamp  # time stamp of the massage
-        self.timestamp_float = (
-            time.mktime(timestamp.timetuple()) + timestamp.microsecond / 1e6
-        )
+        self.timestamp = timestamp  # time stamp of the massage (UTC epoch-seconds)
         self.user = user  # user who posted the message
         self.status = status  # status related to the message
-        self.rtext = rtext
+        self.rtext = rtext  # the text with its marked parts, None for EVE-System
         self.systems = (
             currsystems if currsystems is not None else []
         )  # list of systems mentioned in the message
@@ -55,10 +50,18 @@ class Message(object):
             plain_text if plain_text else message
         )  # plain text of the message, as posted
         self.log_line = log_line
-        self.utc_time = utc
         # if you add the message to a widget, please add it to widgets
         self.widgets = []
 
+    @property
+    def local_time(self) -> datetime.datetime:
+        """time stamp of the message in local time, for display"""
+        return datetime.datetime.fromtimestamp(self.timestamp)
+
+    @property
+    def utc_time(self) -> datetime.datetime:
+        return datetime.datetime.utcfromtimestamp(self.timestamp)
+
     @property
     def plainText(self):
         return self.plain_text
@@ -67,16 +70,6 @@ class Message(object):
     def upperText(self):
         return self.upper_text
 
-    @property
-    def navigable_string(self) -> NavigableString:
-        return self.rtext
-
-    @navigable_string.setter
-    def navigable_string(self, value: NavigableString):
-        if not isinstance(value, NavigableString):
-            raise ValueError("Must be of type NavigableString")
-        self.rtext = value
-
     def __key(self):
         return (self.room, self.plainText, self.timestamp, self.user)
 
@@ -85,7 +78,7 @@ class Message(object):
 
     def __repr__(self):
         return "{} {}/'{}' {}: {}".format(
-            self.timestamp, self.room, self.user, self.status.value, self.plainText
+            self.local_time, self.room, self.user, self.status.value, self.plainText
         )
 
     def __hash__(self):
@@ -0,0 +1,111 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading
+import time
+
+
+class DuplicateStore:
+    """remembers keys of recent messages, to recognise the same message written
+    to the logs of several clients.
+
+    A hash-map holds the time of each key, a timing-wheel of one-second buckets
+    holds the keys which have to be forgotten in that second. Adding, looking up and
+    forgetting keys are all O(1) (amortized).
+    """
+
+    def __init__(self, max_age: int = 1200, tolerance: float = 1.0):
+        """
+        :param max_age: seconds a key is remembered
+        :param tolerance: seconds two timestamps may differ to still be a duplicate
+        """
+        self.max_age = int(max_age)
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._times = {}
+        self._size = self.max_age + 2
+        # each slot holds (second, keys)
+        self._wheel = [None] * self._size
+        # the last second which has been expired
+        self._cursor = None
+
+    def __len__(self):
+        return len(self._times)
+
+    def _expire_slot(self, index: int):
+        second, keys = self._wheel[index]
+        self._wheel[index] = None
+        for key in keys:
+            # the key may have been re-added with a newer time since
+            timestamp = self._times.get(key)
+            if timestamp is not None and int(timestamp) == second:
+                del self._times[key]
+
+    def _advance(self, now: float):
+        horizon = int(now) - self.max_age - 1
+        if self._cursor is None or horizon - self._cursor >= self._size:
+            # first call, or everything is outdated
+            for index in range(self._size):
+                if self._wheel[index] and self._wheel[index][0] <= horizon:
+                    self._expire_slot(index)
+        else:
+            for second in range(self._cursor + 1, horizon + 1):
+                index = second % self._size
+                if self._wheel[index] and self._wheel[index][0] <= horizon:
+                    self._expire_slot(index)
+        self._cursor = max(horizon, self._cursor or horizon)
+
+    def _contains(self, key: str, timestamp: float) -> bool:
+        stored = self._times.get(key)
+        return stored is not None and abs(stored - timestamp) <= self.tolerance
+
+    def contains(self, key: str, timestamp: float) -> bool:
+        """
+        :param key: what identifies the message
+        :param timestamp: epoch-seconds of the message
+        :return: True if the key was added with a timestamp within tolerance
+        """
+        with self._lock:
+            self._advance(time.time())
+            return self._contains(key, timestamp)
+
+    def add(self, key: str, timestamp: float) -> bool:
+        """add the key, unless it is a duplicate
+
+        :param key: what identifies the message
+        :param timestamp: epoch-seconds of the message
+        :return: True if added, False if it is a duplicate
+        """
+        with self._lock:
+            self._advance(time.time())
+            if self._contains(key, timestamp):
+                return False
+            second = int(timestamp)
+            if second <= self._cursor:
+                # already too old to be remembered
+                return True
+            self._times[key] = timestamp
+            index = second % self._size
+            slot = self._wheel[index]
+            if slot and slot[0] != second:
+                # left over from a second outside the window
+                self._expire_slot(index)
+                slot = None
+            if not slot:
+                slot = self._wheel[index] = (second, [])
+            slot[1].append(key)
+            return True
@@ -0,0 +1,200 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import codecs
+import logging
+import os
+
+
+class LogTailReader:
+    """incremental reader for a single EVE chat-log.
+
+    Keeps the byte-offset of what has already been read and an incremental
+    UTF-16 decoder, so each call only reads what was appended to the file since
+    the last call. Incomplete lines are buffered until the line-break arrives.
+    If the file is truncated or replaced (different inode), reading restarts
+    from the beginning.
+    """
+
+    ENCODING = "utf-16-le"
+    BOM = "\ufeff"
+
+    def __init__(self, file_path: str):
+        self.LOGGER = logging.getLogger(__name__)
+        self.file_path = file_path
+        self.inode = None
+        # result of the last os.stat
+        self.stat = None
+        self.offset = 0
+        self._decoder = None
+        self._partial = ""
+        self.reset()
+
+    def reset(self, offset: int = 0):
+        """start reading from the given byte-offset again
+
+        :param offset: byte-offset within the file, must be at a line-start
+        :type offset: int
+        """
+        self.offset = offset
+        self._decoder = codecs.getincrementaldecoder(self.ENCODING)()
+        self._partial = ""
+
+    @property
+    def committed_offset(self) -> int:
+        """byte-offset just after the last complete line returned by "read_lines"
+        """
+        pending_bytes = self._decoder.getstate()[0]
+        return (
+            self.offset
+            - len(pending_bytes)
+            - len(self._partial.encode(self.ENCODING))
+        )
+
+    def _lines_from(self, f, offset: int, end: int = None, chunk: int = 4096):
+        """yield (start, next start, line) for each complete line beginning at offset
+
+        :param f: the log-file, opened binary
+        :param offset: an even byte-offset, the first line returned may be partial
+        :param end: stop at the first line starting at or after this byte-offset
+        """
+        f.seek(offset)
+        position = offset
+        buffer = b""
+        while end is None or position < end:
+            data = f.read(chunk)
+            if not data:
+                return
+            buffer += data
+            search = 0
+            while end is None or position < end:
+                idx = buffer.find(b"\n\x00", search)
+                if idx < 0:
+                    break
+                if idx % 2:
+                    # not on a character boundary
+                    search = idx + 1
+                    continue
+                line = buffer[:idx].decode(self.ENCODING, errors="replace")
+                if position == 0 and line.startswith(self.BOM):
+                    line = line[len(self.BOM) :]
+                next_position = position + idx + 2
+                yield position, next_position, line
+                buffer = buffer[idx + 2 :]
+                position = next_position
+                search = 0
+
+    def head_lines(self, max_lines: int = 16) -> list:
+        """the first lines of the file, where the header-information resides
+
+        :return: list of (byte-offset after the line, line)
+        """
+        head = []
+        with open(self.file_path, "rb") as f:
+            for _, next_start, line in self._lines_from(f, 0):
+                head.append((next_start, line))
+                if len(head) >= max_lines:
+                    break
+        return head
+
+    def range_lines(self, start: int, end: int) -> list:
+        """all complete lines, starting from start up to end
+
+        :param start: byte-offset of a line-start
+        :param end: last line returned starts before this byte-offset
+        :return: list of (byte-offset after the line, line)
+        """
+        lines = []
+        with open(self.file_path, "rb") as f:
+            for _, next_start, line in self._lines_from(f, start, end):
+                lines.append((next_start, line))
+        return lines
+
+    def seek_first(self, start: int, is_wanted, scan_size: int = 8192) -> int:
+        """binary search for the first line, from which on is_wanted is True.
+
+        The lines have to be ordered, so is_wanted is False for all lines before
+        and True for all lines after. Lines is_wanted returns None for are skipped.
+
+        :param start: byte-offset of a line-start to start searching from
+        :param is_wanted: function(line) returning True, False or None
+        :param scan_size: below this number of bytes, the lines are checked one by one
+        :return: byte-offset of the wanted line, or the end of the last complete line
+        """
+        with open(self.file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            # line at low is before the wanted line, line at high is wanted (or EOF)
+            low, high = start, size
+            while high - low > scan_size:
+                middle = ((low + high) // 2) & ~1
+                judged = None
+                lines = self._lines_from(f, middle, high)
+                # the first one is most likely only part of a line
+                next(lines, None)
+                for line_start, next_start, line in lines:
+                    judged = is_wanted(line)
+                    if judged is True:
+                        high = line_start
+                        break
+                    elif judged is False:
+                        low = next_start
+                        break
+                if judged is None:
+                    # no usable line between middle and high
+                    break
+            result = low
+            for line_start, next_start, line in self._lines_from(f, low, high):
+                if is_wanted(line):
+                    return line_start
+                result = next_start
+        return high if high < size else result
+
+    def read_lines(self) -> list:
+        """read all complete lines appended since the last call
+
+        :return: list of lines (without line-break)
+        :rtype: list
+        """
+        try:
+            file_stat = os.stat(self.file_path)
+            if self.inode is not None and file_stat.st_ino != self.inode:
+                self.LOGGER.debug('Log-File "%s" was replaced', self.file_path)
+                self.reset()
+            elif file_stat.st_size < self.offset:
+                self.LOGGER.debug('Log-File "%s" was truncated', self.file_path)
+                self.reset()
+            self.inode = file_stat.st_ino
+            self.stat = file_stat
+            if file_stat.st_size == self.offset:
+                return []
+            with open(self.file_path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except Exception as e:
+            self.LOGGER.error(
+                'Failed to read log file "%s" %r', self.file_path, e,
+            )
+            raise e
+        at_start = self.offset == 0
+        self.offset += len(data)
+        text = self._decoder.decode(data)
+        if at_start and text.startswith(self.BOM):
+            text = text[len(self.BOM) :]
+        lines = (self._partial + text).split("\n")
+        # the last element is either empty or an incomplete line
+        self._partial = lines.pop()
+        return lines
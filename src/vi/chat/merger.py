@@ -0,0 +1,72 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import heapq
+import itertools
+import threading
+import time
+
+
+class ReorderBuffer:
+    """merges the items of several streams into one, ordered by their timestamp.
+
+    Every item is held back for "window" seconds after it arrived, so an older
+    item arriving a little later (from a different stream) still gets in front.
+    Items are released oldest first, items with the same timestamp in the order
+    they arrived.
+    """
+
+    def __init__(self, window: float = 0.5):
+        self.window = window
+        # (timestamp, sequence, arrival, item)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, timestamp: float, item, now: float = None) -> bool:
+        """add an item
+
+        :return: True if the buffer was empty
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            was_empty = not self._heap
+            heapq.heappush(self._heap, (timestamp, next(self._sequence), now, item))
+        return was_empty
+
+    def next_due(self) -> float:
+        """time the oldest item may be released, None if empty
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            return self._heap[0][2] + self.window
+
+    def pop_ready(self, now: float = None) -> list:
+        """all items, which have been held back long enough, in timestamp order
+        """
+        if now is None:
+            now = time.time()
+        ready = []
+        with self._lock:
+            while self._heap and self._heap[0][2] + self.window <= now:
+                ready.append(heapq.heappop(self._heap)[3])
+        return ready
@@ -15,16 +15,26 @@
 #     along with this program.	 If not, see <http://www.gnu.org/licenses/>.
 #
 #
+import calendar
 import datetime
 import logging
 import re
+import time
 
-import six
-from bs4 import BeautifulSoup, NavigableString
 
 from vi.chat.chatmessage import Message
+from vi.chat.richtext import RichText
+from vi.chat.tokenizer import (
+    CHARACTER,
+    SYSTEM,
+    URL,
+    WORD,
+    Span,
+    merge_spans,
+    overlaps,
+)
+from vi.dotlan.systemindex import SystemNameIndex
 from vi.esi.esihelper import EsiHelper
-from vi.settings.settings import GeneralSettings
 from vi.states import State
 
 
@@ -32,44 +42,82 @@ class MessageParserException(Exception):
     pass
 
 
-def bs_text_replace(navigable_string: NavigableString, new_text: str) -> None:
-    new_elements = []
-    for newPart in (
-        BeautifulSoup("<t>{}</t>".format(new_text), "html.parser")
-        .select("t")[0]
-        .contents
-    ):
-        new_elements.append(newPart)
-    try:
-        for newElement in new_elements:
-            navigable_string.insert_before(newElement)
-        navigable_string.replace_with(six.text_type(""))
-    except Exception as e:
-        pass
+# epoch-seconds of midnight (UTC), by "YYYY.MM.DD"
+_day_starts = {}
 
 
-def parse_line(line: str) -> tuple:
-    # finding the timestamp
-    time_start = line.find("[") + 1
-    time_ends = line.find("]")
-    time_str = line[time_start:time_ends].strip()
-    try:
-        utc_timestamp = datetime.datetime.strptime(time_str, "%Y.%m.%d %H:%M:%S")
-    except ValueError:
-        raise MessageParserException("Invalid Timestamp in Line: %s" % (line,))
-    # all Log-Lines are logged in UTC format, so make it Local time
-    # timestamp = utc_timestamp.replace(tzinfo=None)
-    timestamp = (
-        utc_timestamp.replace(tzinfo=datetime.timezone.utc)
-        .astimezone(tz=None)
-        .replace(tzinfo=None)
-    )
+def _day_start(date_str: str) -> int:
+    """epoch-seconds of the day, looked up once per day, None if invalid"""
+    start = _day_starts.get(date_str)
+    if start is None:
+        try:
+            date = datetime.date(
+                int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])
+            )
+        except ValueError:
+            # i.e. 31st of a shorter month
+            return None
+        if len(_day_starts) > 64:
+            _day_starts.clear()
+        start = _day_starts[date_str] = calendar.timegm(date.timetuple())
+    return start
+
+
+def _parse_timestamp(time_str: str) -> float:
+    """"YYYY.MM.DD HH:MM:SS" (UTC) by fixed offsets, as epoch-seconds
+    None if it doesn't fit
+    """
+    if (
+        len(time_str) != 19
+        or time_str[4] != "."
+        or time_str[7] != "."
+        or time_str[10] != " "
+        or time_str[13] != ":"
+        or time_str[16] != ":"
+    ):
+        return None
+    hour, minute, second = time_str[11:13], time_str[14:16], time_str[17:19]
+    if not (
+        time_str[0:4] + time_str[5:7] + time_str[8:10] + hour + minute + second
+    ).isdigit():
+        return None
+    hour, minute, second = int(hour), int(minute), int(second)
+    if hour > 23 or minute > 59 or second > 60:
+        return None
+    day_start = _day_start(time_str[0:10])
+    if day_start is None:
+        return None
+    return float(day_start + hour * 3600 + minute * 60 + second)
+
+
+def split_line(line: str) -> tuple:
+    """split a Log-Line into its parts, without raising on malformed lines.
+
+    :return: (timestamp as UTC epoch-seconds, username, text), None if there is
+        no valid timestamp in the line
+    """
+    # "[ YYYY.MM.DD HH:MM:SS ] " is fixed-width, unless there is something in front
+    if line.startswith("[ ") and line[21:23] == " ]":
+        time_ends = 22
+        timestamp = _parse_timestamp(line[2:21])
+    else:
+        time_ends = line.find("]")
+        timestamp = _parse_timestamp(line[line.find("[") + 1 : time_ends].strip())
+    if timestamp is None:
+        return None
     # finding the username of the poster
-    user_ends = line.find(">")
+    user_ends = line.find(">", time_ends)
     username = line[time_ends + 1 : user_ends].strip()
     # finding the pure message
     text = line[user_ends + 1 :].strip()  # text will the text to work an
-    return utc_timestamp, username, text, timestamp
+    return timestamp, username, text
+
+
+def parse_line(line: str) -> tuple:
+    parsed = split_line(line)
+    if parsed is None:
+        raise MessageParserException("Invalid Timestamp in Line: %s" % (line,))
+    return parsed
 
 
 class MessageParser:
@@ -97,66 +145,98 @@ class MessageParser:
         if len(self.locations) == 0:
             self.locations = {
                 "system": "?",
-                "timestamp": datetime.datetime.now() - datetime.timedelta(days=1),
+                "timestamp": time.time() - 60 * 60 * 24,
             }
 
-    def process_systems(self, dotlan_systems: dict, message: Message) -> bool:
-        if self.local_room or not message.navigable_string:
+    def process_systems(
+        self,
+        dotlan_systems: dict,
+        message: Message,
+        system_index: SystemNameIndex = None,
+    ) -> bool:
+        """mark the systems mentioned in the Message
+
+        :param dotlan_systems: Map-System-Dictionary
+        :param message: the Message to be parsed
+        :param system_index: lookup of the names in dotlan_systems, the one of the Map
+        """
+        if self.local_room or not message.rtext:
             return False
-        count = 0
-        while self._parse_systems(dotlan_systems, message):
-            count += 1
-            if count > 5:
-                self.LOGGER.warning(
-                    "parseSystems excessive runs on %r" % (message.rtext,)
-                )
-                break
-        return count > 0
+        if system_index is None:
+            system_index = SystemNameIndex(dotlan_systems.keys())
+        spans = self._parse_systems(dotlan_systems, message, system_index)
+        return message.rtext.add_spans(spans)
+
+    def process_details(
+        self, message: Message, ships: bool = True, urls: bool = True, charnames: bool = True
+    ) -> bool:
+        """mark Ships, URLs and known Pilots in one pass over the Tokens
+
+        Parts already marked (i.e. Systems) are left alone. Nothing is asked
+        from ESI, see process_unknown_charnames.
+        """
+        if not message.rtext:
+            return False
+        return message.rtext.add_spans(
+            self.detail_spans(message, ships=ships, urls=urls, charnames=charnames)
+        )
+
+    def detail_spans(
+        self, message: Message, ships: bool = True, urls: bool = True, charnames: bool = True
+    ) -> list:
+        """the Spans process_details would add, the Message is left as it is
+        """
+        if not message.rtext:
+            return []
+        spans = []
+        if urls:
+            spans.extend(self._parse_urls(message))
+        if ships:
+            spans = merge_spans(
+                spans, self._parse_ships(message, message.rtext.spans + spans)
+            )
+        if charnames:
+            spans = merge_spans(
+                spans, self._parse_charnames(message, message.rtext.spans + spans)
+            )
+        return spans
 
     def process_ships(self, message: Message) -> bool:
-        if not message.navigable_string:
-            return False
-        count = 0
-        while self._parse_ships(message):
-            count += 1
-            if count > 5:
-                self.LOGGER.warning(
-                    "process_ships excessive runs on %r" % (message.rtext,)
-                )
-                break
-        return count > 0
+        return self.process_details(message, urls=False, charnames=False)
 
     def process_urls(self, message: Message) -> bool:
-        if not message.navigable_string:
-            return False
-        count = 0
-        while self._parse_urls(message):
-            count += 1
-            if count > 5:
-                self.LOGGER.warning("parseUrls excessive runs on %r" % (message.rtext,))
-                break
-        return count > 0
+        return self.process_details(message, ships=False, charnames=False)
 
     def process_charnames(self, message: Message) -> bool:
-        if not message.navigable_string:
+        known = self.process_details(message, ships=False, urls=False)
+        return self.process_unknown_charnames(message) or known
+
+    def process_unknown_charnames(self, message: Message) -> bool:
+        """ask ESI about the words not marked yet, as they may be Character-Names
+        """
+        if not message.rtext:
             return False
-        count = 0
-        while self._parse_charnames(message):
-            count += 1
-            if count > 5:
-                self.LOGGER.warning(
-                    "process_charnames excessive runs on %r" % (message.rtext,)
-                )
-                break
-        return count > 0
+        return message.rtext.add_spans(self.unknown_charname_spans(message))
+
+    def unknown_charname_spans(self, message: Message) -> list:
+        """the Spans process_unknown_charnames would add, the Message is left as it is
+        """
+        if not message.rtext:
+            return []
+        return self._lookup_charnames(message, list(message.rtext.spans))
 
-    def process(self, line) -> object:
+    def process(self, line: str, parsed: tuple = None) -> object:
         """process a Log-Line.
+
+        :param line: the Log-Line
+        :param parsed: result of parse_line for this line, if already available
         """
         message = None
-        utctime, username, text, timestamp = parse_line(line)
+        if parsed is None:
+            parsed = parse_line(line)
+        timestamp, username, text = parsed
         # anything older than max_age, ignore
-        if (datetime.datetime.utcnow() - utctime).total_seconds() > self.message_age:
+        if time.time() - timestamp > self.message_age:
             self.LOGGER.debug(
                 "%s/%s: Message-Line too old: %s"
                 % (self.room_name, self.char_name, line,)
@@ -182,13 +262,10 @@ class MessageParser:
                     currsystems=[system],
                     status=status,
                     log_line=line,
-                    utc=utctime,
                 )
             return message
         original_text = text
-        formatted_text = u"<rtext>{0}</rtext>".format(text)
-        soup = BeautifulSoup(formatted_text, "html.parser")
-        navi_text = soup.select("rtext")[0]
+        rtext = RichText(text)
         upper_text = text.upper()
         if self.room_name.startswith("="):
             return Message(
@@ -197,11 +274,10 @@ class MessageParser:
                 timestamp,
                 username,
                 status=State["KOS_STATUS_REQUEST"],
-                rtext=navi_text,
+                rtext=rtext,
                 plain_text=original_text,
                 upper_text=upper_text,
                 log_line=line,
-                utc=utctime,
             )
         # KOS request
         elif upper_text.startswith("XXX "):
@@ -210,12 +286,11 @@ class MessageParser:
                 text,
                 timestamp,
                 username,
-                rtext=navi_text,
+                rtext=rtext,
                 status=State["KOS_STATUS_REQUEST"],
                 plain_text=original_text,
                 upper_text=upper_text,
                 log_line=line,
-                utc=utctime,
             )
         elif upper_text.startswith("VINTELSOUND_TEST"):
             return Message(
@@ -224,14 +299,13 @@ class MessageParser:
                 timestamp,
                 username,
                 status=State["SOUND_TEST"],
-                rtext=navi_text,
+                rtext=rtext,
                 plain_text=original_text,
                 upper_text=upper_text,
                 log_line=line,
-                utc=utctime,
             )
 
-        parsed_status = self.get_status(navi_text)
+        parsed_status = self.get_status(text)
         status = parsed_status if parsed_status is not None else State["ALARM"]
         message = Message(
             self.room_name,
@@ -239,373 +313,185 @@ class MessageParser:
             timestamp,
             username,
             status=status,
-            rtext=navi_text,
+            rtext=rtext,
             plain_text=original_text,
             upper_text=upper_text,
             log_line=line,
-            utc=utctime,
         )
 
         return message
 
-    def _parse_systems(self, dotlan_systems: dict, message: Message) -> bool:
+    def _parse_systems(
+        self, dotlan_systems: dict, message: Message, system_index: SystemNameIndex
+    ) -> list:
         """check for any System-Names or Gates mentioned in the Chat-Entry.
 
         :param dotlan_systems: Map-System-Dictionary
         :type dotlan_systems: dict
         :param message: the Message to be parsed
         :type message: Message
-        :return: bool: systems found in Message
+        :param system_index: lookup of the names in dotlan_systems
+        :return: list of Span for the systems found
         """
-        system_names = set(dotlan_systems.keys())
         # words to ignore on the system parser. use UPPER CASE
         WORDS_TO_IGNORE = ("IN", "IS", "AS")
 
-        def format_system(f_text, f_word, f_system):
-            new_text = u"""<a style="color:{2};font-weight:bold" href="mark_system/{0}">{1}</a>"""
-            return f_text.replace(
-                f_word,
-                new_text.format(f_system, f_word, GeneralSettings().color_system),
-            )
-
-        texts = [
-            t
-            for t in message.navigable_string.contents
-            if isinstance(t, NavigableString)
-            and t is not None
-            and message.navigable_string.contents
+        spans = []
+        words = [
+            token
+            for token in message.rtext.tokens
+            if token.kind == WORD and not overlaps(token, message.rtext.spans)
         ]
-        for wtIdx, text in enumerate(texts):
-            work_text = text
-            work_text = self.chars_to_ignore.sub("", work_text)
-            # for char in self.CHARS_TO_IGNORE:
-            #     work_text = work_text.replace(char, "")
-            # Drop redundant whitespace so as to not throw off word index
-            work_text = " ".join(work_text.split())
-            words = work_text.split(" ")
-
-            for idx, word in enumerate(words):
-                # Is this about another a system's gate?
-                if len(words) > idx + 1:
-                    if words[idx + 1].upper() == "GATE":
-                        bailout = True
-                        if len(words) > idx + 2:
-                            if words[idx + 2].upper() == "TO":
-                                # Could be '___ GATE TO somewhere' so check this one.
-                                bailout = False
-                        if bailout:
-                            # '_____ GATE' mentioned in message, which is not what we're
-                            # interested in, so go to checking next word.
-                            continue
-                upper_word = word.upper()
-                if upper_word != word and upper_word in WORDS_TO_IGNORE:
-                    continue
-                if upper_word in system_names:  # - direct hit on name
-                    message.systems.append(dotlan_systems[upper_word])  # of the system?
-                    self.LOGGER.debug('Found a system "{}"'.format(upper_word))
-                    formatted_text = format_system(text, word, upper_word)
-                    bs_text_replace(text, formatted_text)
-                    return True
-                elif 1 < len(upper_word) < 5:  # - upper_word < 4 chars.
-                    for system in system_names:  # system begins with?
-                        if system.startswith(upper_word):
-                            self.LOGGER.debug(
-                                'Using beginning part of System-Name "{}" as "{}"'.format(
-                                    upper_word, system
-                                )
-                            )
-                            message.systems.append(dotlan_systems[system])
-                            formatted_text = format_system(text, word, system)
-                            bs_text_replace(text, formatted_text)
-                            return True
-                elif (
-                    "-" in upper_word and len(upper_word) > 2
-                ):  # - short with - (minus)
-                    upper_word_parts = upper_word.split("-")  # (I-I will match I43-IF3)
-                    for system in system_names:
-                        systemParts = system.split("-")
-                        if (
-                            len(upper_word_parts) == 2
-                            and len(systemParts) == 2
-                            and len(upper_word_parts[0]) > 1
-                            and len(upper_word_parts[1]) > 1
-                            and len(systemParts[0]) > 1
-                            and len(systemParts[1]) > 1
-                            and len(upper_word_parts) == len(systemParts)
-                            and upper_word_parts[0][0] == systemParts[0][0]
-                            and upper_word_parts[1][0] == systemParts[1][0]
-                        ):
-                            self.LOGGER.debug(
-                                'Using some part of System-Name "{}" as "{}"'.format(
-                                    upper_word, system
-                                )
-                            )
-                            message.systems.append(dotlan_systems[system])
-                            formatted_text = format_system(text, word, system)
-                            bs_text_replace(text, formatted_text)
-                            return True
-                elif len(upper_word) > 1:  # what if F-YH58 is named FY?
-                    for system in system_names:
-                        cleared_system = system.replace("-", "")
-                        if cleared_system.startswith(upper_word):
-                            self.LOGGER.debug(
-                                'Using shortcut of System-Name "{}" as "{}"'.format(
-                                    upper_word, system
-                                )
-                            )
-                            message.systems.append(dotlan_systems[system])
-                            formatted_text = format_system(text, word, system)
-                            bs_text_replace(text, formatted_text)
-                            return True
-        return False
-
-    def _parse_ships(self, message: Message) -> bool:
+        for idx, token in enumerate(words):
+            # Is this about another a system's gate?
+            if len(words) > idx + 1:
+                if words[idx + 1].text.upper() == "GATE":
+                    bailout = True
+                    if len(words) > idx + 2:
+                        if words[idx + 2].text.upper() == "TO":
+                            # Could be '___ GATE TO somewhere' so check this one.
+                            bailout = False
+                    if bailout:
+                        # '_____ GATE' mentioned in message, which is not what we're
+                        # interested in, so go to checking next word.
+                        continue
+            word = token.text
+            upper_word = word.upper()
+            if upper_word != word and upper_word in WORDS_TO_IGNORE:
+                continue
+            system = system_index.resolve(upper_word)
+            if system and system in dotlan_systems:
+                self.LOGGER.debug('Found a system "%s" as "%s"', word, system)
+                if dotlan_systems[system] not in message.systems:
+                    message.systems.append(dotlan_systems[system])
+                spans.append(Span(token.start, token.end, SYSTEM, system, None))
+        return spans
+
+    def _parse_ships(self, message: Message, taken: list) -> list:
         """
         check the Chat-Entry to see if any ships are mentioned. If so, tag them with "ship_name"
-        :param rtext: Tag
-        :return: bool if content has changed
+        :param message: the Message to be parsed
+        :param taken: spans already marked, no Ship is looked for in there
+        :return: list of Span for the ships found
         """
+        spans = EsiHelper().ship_matcher.match(
+            message.rtext.text, message.rtext.tokens, taken
+        )
+        for span in spans:
+            self.LOGGER.debug('Found a ship "%s"', span.target)
+        return spans
 
-        def format_ship_name(
-            f_text: str, f_realShipName: str, f_word: str, f_tooltip: str
-        ) -> str:
-            new_text = u"""<a style="color:{3};font-weight:bold" title="{2}" href="ship_name/{0}">{1}</a>"""
-            return f_text.replace(
-                f_word,
-                new_text.format(
-                    f_realShipName, f_word, f_tooltip, GeneralSettings().color_ship
-                ),
-            )
-
-        # navigable_string = message.navigable_string
-
-        texts = [
-            t
-            for t in message.navigable_string.contents
-            if isinstance(t, NavigableString)
-            and t is not None
-            and message.navigable_string.contents
-        ]
-        for text in texts:
-            if len(text.strip(" ")) == 0:
-                continue
-            parse_text_parts = text.strip(" ").split(" ")
-            for parse_part in parse_text_parts:
-                upper_text = parse_part.upper()
-                # escape all cahracters
-                upper_text = self.chars_to_ignore.sub("", upper_text)
-                # for char in self.CHARS_TO_IGNORE:
-                #     upper_text = upper_text.replace(char, "")
-
-                # for shipName in evegate.SHIPNAMES:
-                if upper_text in EsiHelper().ShipsUpper:
-                    hit = True
-                    start = text.upper().find(upper_text)
-                    end = start + len(upper_text)
-                    if (
-                        start > 0
-                        and text.upper()[start - 1] not in (".", ",", " ", "X", ":")
-                    ) or (
-                        end < len(text.upper()) - 1
-                        and text.upper()[end] not in (".", ",", "S", " ", ":")
-                    ):
-                        hit = False
-                    if hit:
-                        ship_in_text = text[start:end]
-                        try:
-                            ship_type = EsiHelper().esi.getShipGroupTypes(
-                                EsiHelper().ShipsUpper[upper_text]["group_id"]
-                            )["name"]
-                            self.LOGGER.debug('ESI found a ship "%s"', ship_in_text)
-                            formatted = format_ship_name(
-                                text, ship_in_text, parse_part, ship_type
-                            )
-                            bs_text_replace(text, formatted)
-                            return True
-                        except TypeError as e:
-                            self.LOGGER.warning(
-                                "Expected to find %s as %s, but failed...",
-                                ship_in_text,
-                                upper_text,
-                            )
-                            pass
-        return False
-
-    def _parse_urls(self, message: Message) -> bool:
+    def _parse_urls(self, message: Message) -> list:
         """
         check the Chat-Message for any URLs and tag appropiately
-        :param navigable_string:
-        :return:
+        :param message: the Message to be parsed
+        :return: list of Span for the URLs found
         """
-
-        def find_urls(s):
-            # yes, this is faster than regex and less complex to read
-            f_urls = []
-            prefixes = ("http://", "https://")
-            for prefix in prefixes:
-                start = 0
-                while start >= 0:
-                    start = s.find(prefix, start)
-                    if start >= 0:
-                        stop = s.find(" ", start)
-                        if stop < 0:
-                            stop = len(s)
-                        f_urls.append(s[start:stop])
-                        start += 1
-            return f_urls
-
-        def format_url(f_text, f_url):
-            new_text = (
-                u"""<a style="color:{1};font-weight:bold" href="link/{0}">{0}</a>"""
-            )
-            return f_text.replace(
-                f_url, new_text.format(f_url, GeneralSettings().color_url)
-            )
-
-        # navigable_string = message.navigable_string
-        texts = [
-            t
-            for t in message.navigable_string.contents
-            if isinstance(t, NavigableString)
-            and t is not None
-            and message.navigable_string.contents
+        return [
+            Span(token.start, token.end, URL, token.text, None)
+            for token in message.rtext.tokens
+            if token.kind == URL
         ]
-        for text in texts:
-            urls = find_urls(text)
-            for url in urls:
-                bs_text_replace(text, format_url(text, url))
-                return True
 
-    def _parse_charnames(self, message: Message) -> bool:
+    def _parse_charnames(self, message: Message, taken: list) -> list:
+        """
+        check the Chat-Entry for Pilots ESI confirmed before, no calls to ESI
+        :param message: the Message to be parsed
+        :param taken: spans already marked, words in there are no Character-Names
+        :return: list of Span for the Characters found
+        """
+        return EsiHelper.known_pilots.match(
+            message.rtext.text, message.rtext.tokens, taken
+        )
+
+    def _lookup_charnames(self, message: Message, taken: list) -> list:
         """
         check the Chat-Entry for any Character-Names and mark them with "show_enemy"
-        :param navigable_string:
-        :return:
+        :param message: the Message to be parsed
+        :param taken: spans already marked, words in there are no Character-Names
+        :return: list of Span for the Characters found
         """
         MAX_WORDS_FOR_CHARACTERNAME = 3
 
-        # simple list of words
-        def build_matrix(text_line: str, separator=" ") -> list:
-            text_line = self.chars_to_ignore.sub("", text_line)
-            text_line = self.words_to_ignore.sub("", text_line)
-            return text_line.strip().split(separator)
-
-        # get adjacent words from list
-        def coord_word(coord: tuple, matrix: list) -> str:
-            return matrix[coord[0] : coord[1] + 1]
-
-        # combine adjacent words
-        def convert_to_name(coord_matrix, matrix: list, separator: str = " ") -> str:
-            return separator.join(coord_word(coord_matrix, matrix))
-
-        # build a list of coordinates based on matrix
-        def build_list(
-            matrix: list, maxlength: int = MAX_WORDS_FOR_CHARACTERNAME
-        ) -> list:
-            coord_list = []
-            for l in range(maxlength, 0, -1):
-                for i, word in enumerate(matrix):
-                    if i + l > len(matrix):
-                        break
-                    coord_list.append(
-                        (i, i + l - 1, convert_to_name((i, i + l - 1), matrix))
-                    )
-            return coord_list
-
-        # remove a tuple match from match_list
-        def does_contain(coord: tuple, match: tuple) -> bool:
-            start, end, word = match
-            for index in range(coord[0], coord[1] + 1):
-                if start <= index <= end:
-                    return True
-            return False
-
-        def find_names(matrix: list, found_names: list) -> tuple:
-            for start, end, name in matrix:
-                if len(name) > 3:
-                    self.LOGGER.debug("Asking ESI for character '%s'", name.strip())
-                    player = EsiHelper().checkPlayerName(name.strip())
-                    if player:
-                        self.LOGGER.debug('ESI found the character "%s"', name.strip())
-                        found_names.append((name.strip(), player))
-                        return start, end, name
-            return 0, 0, None
-
-        def format_charname(use_text: str, charname: str, esi_character: dict):
-            format_text = u"""<a style="color:{2};font-weight:bold" href="show_enemy/{1}">{0}</a>"""
-            return re.sub(r" +", r" ", use_text).replace(
-                charname,
-                format_text.format(
-                    charname, esi_character["id"], GeneralSettings().color_character
-                ),
-            )
-
-        texts = [
-            t
-            for t in message.navigable_string.contents
-            if isinstance(t, NavigableString)
-            and t is not None
-            and message.navigable_string.contents
-        ]
-        found_names = []
-        for text in texts:  # iterate through each
-            matrix = build_list(build_matrix(text))
-            while True:
-                s, e, n = find_names(matrix, found_names)
-                if not n:
-                    break
-                self.LOGGER.debug("Before rescan (Skip %d,%d): %r", s, e, matrix)
-                matrix = [x for x in matrix if not does_contain((s, e), x)]
-                self.LOGGER.debug("After rescan: %r", matrix)
-            for name, esi_char in found_names:
-                new_text = format_charname(text, name, esi_char)
-                bs_text_replace(text, new_text)
-        return len(found_names) > 0
-
-    def get_status(self, navigable_string: NavigableString) -> State:
+        # runs of words only separated by blanks, as a name would be
+        runs = []
+        run = []
+        for token in message.rtext.tokens:
+            if (
+                token.kind != WORD
+                or token.text.upper() in self.WORDS_TO_IGNORE
+                or overlaps(token, taken)
+            ):
+                run = []
+                continue
+            if run and message.plain_text[run[-1].end : token.start].strip(" "):
+                run = []
+            if not run:
+                runs.append(run)
+            run.append(token)
+
+        # (span, name) of every candidate, the longest first
+        candidates = []
+        for length in range(MAX_WORDS_FOR_CHARACTERNAME, 0, -1):
+            for run in runs:
+                for i in range(len(run) - length + 1):
+                    first, last = run[i], run[i + length - 1]
+                    name = " ".join(message.plain_text[first.start : last.end].split())
+                    if len(name) > 3:
+                        candidates.append(
+                            (Span(first.start, last.end, CHARACTER, None, None), name)
+                        )
+        if not candidates:
+            return []
+
+        # all of them in one go
+        self.LOGGER.debug("Asking ESI for %d characters", len(candidates))
+        players = EsiHelper().checkPlayerNames([name for _, name in candidates])
+        self.LOGGER.debug(
+            "Names known not to be characters: %r", EsiHelper.not_characters.statistics()
+        )
+        spans = []
+        for span, name in candidates:
+            player = players.get(name)
+            if player and not overlaps(span, spans):
+                self.LOGGER.debug('ESI found the character "%s"', name)
+                spans.append(span._replace(target=str(player["id"])))
+        return spans
+
+    def get_status(self, text: str) -> State:
         """
         parse the Chat-Line to see if there are any System-Statuses triggered
         """
-        texts = [
-            t
-            for t in navigable_string
-            if isinstance(t, NavigableString) and navigable_string is not None
-        ]
-        for text in texts:
-            upper_text = text.strip().upper()
-            original_text = upper_text
-            upper_text = self.chars_to_ignore.sub("", upper_text)
-            # for char in self.CHARS_TO_IGNORE:
-            #     upper_text = upper_text.replace(char, "")
-            upper_words = upper_text.split()
-            if (
-                "CLEAR" in upper_words or "CLR" in upper_words
-            ) and not original_text.endswith("?"):
-                return State["CLEAR"]
-            elif (
-                "STAT" in upper_words
-                or "STATUS" in upper_words
-                or (
-                    ("CLEAR" in upper_words or "CLR" in upper_words)
-                    and original_text.endswith("?")
-                )
-            ):
-                return State["REQUEST"]
-            elif "?" in original_text:
-                return State["REQUEST"]
-            elif text.strip().upper() in (
-                "BLUE",
-                "BLUES ONLY",
-                "ONLY BLUE",
-                "STILL BLUE",
-                "ALL BLUES",
-            ):
-                return State["CLEAR"]
+        upper_text = text.strip().upper()
+        original_text = upper_text
+        upper_text = self.chars_to_ignore.sub("", upper_text)
+        upper_words = upper_text.split()
+        if (
+            "CLEAR" in upper_words or "CLR" in upper_words
+        ) and not original_text.endswith("?"):
+            return State["CLEAR"]
+        elif (
+            "STAT" in upper_words
+            or "STATUS" in upper_words
+            or (
+                ("CLEAR" in upper_words or "CLR" in upper_words)
+                and original_text.endswith("?")
+            )
+        ):
+            return State["REQUEST"]
+        elif "?" in original_text:
+            return State["REQUEST"]
+        elif original_text in (
+            "BLUE",
+            "BLUES ONLY",
+            "ONLY BLUE",
+            "STILL BLUE",
+            "ALL BLUES",
+        ):
+            return State["CLEAR"]
         return State["ALARM"]
 
 
 if __name__ == "__main__":
     mp = MessageParser("Test", "myself", {}, False)
-    message = Message(
-        "test", "this is what we aren't looking for", datetime.datetime.now(), "myself"
-    )
+    message = Message("test", "this is what we aren't looking for", time.time(), "myself")
@@ -0,0 +1,138 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading
+from collections import deque
+
+from vi.chat.tokenizer import CHARACTER, WORD, Span, overlaps, tokenize
+
+
+class PilotMatcher:
+    """finds known Pilots in the Tokens of a Message, in one scan.
+
+    An Aho-Corasick automaton over the words of the names: all names ending at
+    a word are known as soon as the word is read. The names are compared as
+    written, as ESI confirmed them. The longest name wins.
+    """
+
+    def __init__(self, pilots: dict):
+        """
+        :param pilots: {name: character id}
+        """
+        # per state: next state by word, fallback state, (length in words, id) ending here
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for name, charid in pilots.items():
+            tokens = tokenize(name)
+            if not tokens or any(token.kind != WORD for token in tokens):
+                continue
+            state = 0
+            for token in tokens:
+                next_state = self.goto[state].get(token.text)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][token.text] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((len(tokens), charid))
+        # fallbacks, breadth first
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(word, 0)
+                self.output[next_state] = (
+                    self.output[next_state] + self.output[self.fail[next_state]]
+                )
+
+    def match(self, text: str, tokens: list, taken: list = ()) -> list:
+        """the known Pilots mentioned
+
+        A name is only found if its words are separated by blanks, as in the name.
+        :param text: the text the tokens are from
+        :param tokens: the Tokens of the text
+        :param taken: spans already marked, no Pilot is found in there
+        :return: list of Span (target is the character id)
+        """
+        found = []
+        words = []
+        state = 0
+        last_end = None
+        for token in tokens:
+            if token.kind != WORD or overlaps(token, taken):
+                state = 0
+                last_end = None
+                continue
+            if last_end is not None and text[last_end : token.start].strip(" "):
+                state = 0
+            while state and token.text not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token.text, 0)
+            words.append(token)
+            last_end = token.end
+            for length, charid in self.output[state]:
+                found.append(
+                    Span(words[-length].start, token.end, CHARACTER, str(charid), None)
+                )
+        spans = []
+        for span in sorted(found, key=lambda s: (s.start - s.end, s.start)):
+            if not overlaps(span, spans):
+                spans.append(span)
+        spans.sort()
+        return spans
+
+
+class KnownPilots:
+    """the Pilots ESI confirmed so far, to be found without asking again.
+
+    The automaton is compiled when first needed after a Pilot was added.
+    """
+
+    def __init__(self):
+        # name -> character id
+        self.pilots = {}
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pilots)
+
+    def __contains__(self, name):
+        return name in self.pilots
+
+    def add(self, name: str, charid: int):
+        with self._lock:
+            if self.pilots.get(name) != charid:
+                self.pilots[name] = charid
+                self._matcher = None
+
+    def match(self, text: str, tokens: list, taken: list = ()) -> list:
+        """see PilotMatcher.match"""
+        matcher = self._matcher
+        if matcher is None:
+            with self._lock:
+                if self._matcher is None:
+                    self._matcher = PilotMatcher(self.pilots)
+                matcher = self._matcher
+        return matcher.match(text, tokens, taken)
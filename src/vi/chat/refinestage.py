@@ -0,0 +1,76 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import logging
+import time
+
+from vi.chat.chatmessage import Message
+
+
+class RefineStage:
+    """one step of refining a Message, with the time it may take.
+
+    annotate(message) returns the Spans found without changing the Message,
+    so a late result can simply be dropped. The budget counts from the start
+    of the refining. A local stage over budget is only logged, its result is
+    still used. A network stage over budget is cancelled: it isn't started
+    when it's late already, its result is dropped when it finishes late.
+    """
+
+    def __init__(self, name: str, annotate, budget: float, network: bool = False):
+        """
+        :param annotate: function(Message) -> list of Span
+        :param budget: seconds after the start of refining
+        :param network: runs in the background, see ChatMonitorThread.network_pool
+        """
+        self.LOGGER = logging.getLogger(__name__)
+        self.name = name
+        self.annotate = annotate
+        self.budget = budget
+        self.network = network
+
+    def __repr__(self):
+        return "RefineStage(%r, %.2fs%s)" % (
+            self.name,
+            self.budget,
+            ", network" if self.network else "",
+        )
+
+    def run(self, message: Message, started: float) -> list:
+        """the Spans found, None if the stage was cancelled
+
+        :param started: time.time() when refining of the Message started
+        """
+        if self.network and time.time() - started > self.budget:
+            self.LOGGER.debug("%s: cancelled, late before start on %r", self.name, message)
+            return None
+        spans = self.annotate(message)
+        elapsed = time.time() - started
+        if elapsed > self.budget:
+            if self.network:
+                self.LOGGER.info(
+                    "%s: dropped, took %.2fs of %.2fs on %r",
+                    self.name,
+                    elapsed,
+                    self.budget,
+                    message,
+                )
+                return None
+            self.LOGGER.warning(
+                "%s: took %.2fs of %.2fs on %r", self.name, elapsed, self.budget, message
+            )
+        return spans
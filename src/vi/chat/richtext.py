@@ -0,0 +1,104 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import html
+
+from vi.chat.tokenizer import CHARACTER, SHIP, SYSTEM, URL, Span, merge_spans, tokenize
+from vi.settings.settings import GeneralSettings
+
+
+def format_span(span: Span, word: str) -> str:
+    """the link for a Span, as the chat-label shows it
+
+    :param word: the text of the Span
+    """
+    word = html.escape(word, quote=False)
+    target = html.escape(span.target)
+    if span.kind == SYSTEM:
+        return u"""<a style="color:{2};font-weight:bold" href="mark_system/{0}">{1}</a>""".format(
+            target, word, GeneralSettings().color_system
+        )
+    elif span.kind == SHIP:
+        return u"""<a style="color:{3};font-weight:bold" title="{2}" href="ship_name/{0}">{1}</a>""".format(
+            target, word, html.escape(span.title), GeneralSettings().color_ship
+        )
+    elif span.kind == URL:
+        return u"""<a style="color:{2};font-weight:bold" href="link/{0}">{1}</a>""".format(
+            target, word, GeneralSettings().color_url
+        )
+    elif span.kind == CHARACTER:
+        return u"""<a style="color:{2};font-weight:bold" href="show_enemy/{0}">{1}</a>""".format(
+            target, word, GeneralSettings().color_character
+        )
+    return word
+
+
+class RichText:
+    """the text of a Message with its marked parts.
+
+    Only the plain text and the sorted Spans are kept, the html for the
+    chat-label is rendered when first asked for and cached until a Span is added.
+    """
+
+    __slots__ = ("text", "spans", "_tokens", "_html")
+
+    def __init__(self, text: str, spans: list = None):
+        self.text = text
+        self.spans = sorted(spans) if spans else []
+        self._tokens = None
+        self._html = None
+
+    def __len__(self):
+        return len(self.text)
+
+    def __str__(self):
+        return self.html
+
+    def __repr__(self):
+        return "RichText(%r, %r)" % (self.text, self.spans)
+
+    @property
+    def tokens(self) -> list:
+        """the text split into Tokens, done once"""
+        if self._tokens is None:
+            self._tokens = tokenize(self.text)
+        return self._tokens
+
+    def add_spans(self, spans: list) -> bool:
+        """mark more parts of the text, Spans overlapping a marked part are dropped
+
+        :return: bool: anything new marked
+        """
+        merged = merge_spans(self.spans, spans)
+        if len(merged) == len(self.spans):
+            return False
+        self.spans = merged
+        self._html = None
+        return True
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            parts = []
+            position = 0
+            for span in self.spans:
+                parts.append(html.escape(self.text[position : span.start], quote=False))
+                parts.append(format_span(span, self.text[span.start : span.end]))
+                position = span.end
+            parts.append(html.escape(self.text[position:], quote=False))
+            self._html = "".join(parts)
+        return self._html
@@ -0,0 +1,69 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading
+
+from vi.chat.chatmessage import Message
+from vi.states import State
+
+
+class RoomHistory:
+    """what a chat-room's recent Messages tell a CLEAR without a system.
+
+    Only the number of Messages added is counted, and the latest REQUEST naming
+    systems is kept while it is within the look-back.
+    """
+
+    # a CLEAR only answers a REQUEST among this many previous messages
+    LOOK_BACK = 6
+
+    def __init__(self, capacity: int = LOOK_BACK):
+        self.capacity = capacity
+        # number of Messages added so far
+        self.count = 0
+        # (count when added, Message)
+        self.latest_request = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """number of Messages within the look-back"""
+        return min(self.count, self.capacity)
+
+    def add(self, message: Message):
+        with self._lock:
+            self.count += 1
+            if message.status == State["REQUEST"] and message.systems:
+                self.latest_request = (self.count, message)
+            elif (
+                self.latest_request is not None
+                and self.count - self.latest_request[0] >= self.capacity
+            ):
+                # out of reach, don't hold on to it
+                self.latest_request = None
+
+    def answered_request(self) -> Message:
+        """the REQUEST a CLEAR without a system most likely answers
+
+        :return: the latest REQUEST within the look-back, None if there is none
+        """
+        with self._lock:
+            if self.latest_request is None:
+                return None
+            position, message = self.latest_request
+            if self.count - position >= self.capacity:
+                return None
+            return message
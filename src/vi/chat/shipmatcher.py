@@ -0,0 +1,90 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from vi.chat.tokenizer import SHIP, URL, WORD, Span, overlaps, tokenize
+
+
+class ShipMatcher:
+    """finds Ship-Names in the Tokens of a Message.
+
+    The names are held as a tree of their words in UPPER CASE, so multi-word
+    names ("Vexor Navy Issue") are found by walking along the Tokens. The
+    longest name starting at a word wins. The name of the Ship-Group is kept
+    with each Ship, for the tooltip.
+    """
+
+    def __init__(self, ships: list, group_names: dict):
+        """
+        :param ships: list of Ship-Items (name, group_id, ...), as of EsiInterface.getShipList
+        :param group_names: {group_id: name of the group}
+        """
+        # text of the Token -> (next level, (name, group name) if a name ends here)
+        self.root = {}
+        self.count = 0
+        for ship in ships:
+            name = str(ship["name"])
+            tokens = tokenize(name)
+            if not tokens or tokens[0].kind != WORD:
+                continue
+            tokens = [token.text.upper() for token in tokens]
+            level = self.root
+            for text in tokens[:-1]:
+                level = level.setdefault(text, ({}, None))[0]
+            children, _ = level.get(tokens[-1], ({}, None))
+            level[tokens[-1]] = (children, (name, group_names.get(ship["group_id"], "")))
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def match(self, text: str, tokens: list, taken: list = ()) -> list:
+        """the Ships mentioned
+
+        A name is only found if its words are separated by blanks, as in the name.
+        :param text: the text the tokens are from
+        :param tokens: the Tokens of the text
+        :param taken: spans already marked, no Ship is found in there
+        :return: list of Span (target is the name of the Ship, title its group)
+        """
+        spans = []
+        end = 0
+        for index, token in enumerate(tokens):
+            if token.start < end or token.kind != WORD:
+                continue
+            found = None
+            level = self.root
+            last_end = token.start
+            for next_token in tokens[index:]:
+                if next_token.kind == URL or text[last_end : next_token.start].strip(" "):
+                    break
+                node = level.get(next_token.text.upper())
+                if node is None:
+                    break
+                level, ship = node
+                last_end = next_token.end
+                if ship:
+                    found = (last_end, ship)
+                if not level:
+                    break
+            if found is None:
+                continue
+            span = Span(token.start, found[0], SHIP, found[1][0], found[1][1])
+            if overlaps(span, taken):
+                continue
+            spans.append(span)
+            end = span.end
+        return spans
@@ -0,0 +1,76 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import re
+from collections import namedtuple
+
+# kinds of Token
+WORD = "word"
+PUNCT = "punct"
+URL = "url"
+
+# kinds of Span
+SYSTEM = "system"
+SHIP = "ship"
+CHARACTER = "character"
+# URL as above
+
+# start and end are offsets into the text of the Message
+Token = namedtuple("Token", ("kind", "text", "start", "end"))
+# target: what the Span links to (System-Name, Ship-Name, URL, Character-ID)
+# title: tooltip of the link, if any
+Span = namedtuple("Span", ("start", "end", "kind", "target", "title"))
+
+# characters which are not part of a word, same as MessageParser.CHARS_TO_IGNORE
+PUNCTUATION = "*?,!.()+:"
+
+_TOKEN = re.compile(
+    r"(?P<url>https?://\S+)"
+    r"|(?P<punct>[" + re.escape(PUNCTUATION) + r"])"
+    r"|(?P<word>[^\s" + re.escape(PUNCTUATION) + r"]+)"
+)
+
+
+def tokenize(text: str) -> list:
+    """split a chat-text once into words, punctuation and URLs
+
+    A URL runs up to the next whitespace. Whitespace is not returned, the
+    offsets of the Tokens tell where it was.
+    :return: list of Token, in order of the text
+    """
+    return [
+        Token(match.lastgroup, match.group(), match.start(), match.end())
+        for match in _TOKEN.finditer(text)
+    ]
+
+
+def overlaps(span, spans: list) -> bool:
+    """span (or Token) shares any character with one of the spans"""
+    return any(span.start < other.end and other.start < span.end for other in spans)
+
+
+def merge_spans(spans: list, new_spans: list) -> list:
+    """add new_spans to spans, dropping any new one overlapping one added before
+
+    :return: the combined spans, in order of the text
+    """
+    merged = list(spans)
+    for span in new_spans:
+        if not overlaps(span, merged):
+            merged.append(span)
+    merged.sort()
+    return merged
@@ -31,6 +31,7 @@ from vi.cache import Cache
 from vi.dotlan.colorjavascript import ColorJavaScript
 from vi.dotlan.jumpbridge import Jumpbridge
 from vi.dotlan.system import System
+from vi.dotlan.systemindex import SystemNameIndex
 from vi.dotlan.exception import DotlanException
 from vi.esi import EsiInterface
 from vi.logger.mystopwatch import ViStopwatch
@@ -134,6 +135,7 @@ class MyMap:
         self.systemsById = {}
         for system in self.systems.values():
             self.systemsById[system.system_id] = system
+        self.system_index = SystemNameIndex(self.systems.keys())
         self._prepareSvg()
         self._connectNeighbours()
         self.marker = self.soup.select("#select_marker")[0]
@@ -224,13 +224,13 @@ class System:
         svgtext = self.map_soup.select("#stats_" + str(self.system_id))[0]
         svgtext.string = text
 
-    def setStatus(self, new_status, alarm_time: float = time.time()):
-        if not isinstance(alarm_time, float):
-            if isinstance(alarm_time, datetime.datetime):
-                alarm_time = (
-                    time.mktime(alarm_time.timetuple()) + alarm_time.microsecond / 1e6
-                )
-                # alarm_time = (alarm_time - datetime.datetime(1970, 1, 1)).total_seconds()
+    def setStatus(self, new_status, alarm_time: float = None):
+        """
+        :param new_status: State
+        :param alarm_time: epoch-seconds of the alarm, defaults to now
+        """
+        if alarm_time is None:
+            alarm_time = time.time()
         if new_status in (State["ALARM"], State["CLEAR"], State["REQUEST"]):
             self.lastAlarmTime = alarm_time
             if new_status == State["ALARM"]:
@@ -0,0 +1,76 @@
+#   Vintel - Visual Intel Chat Analyzer
+#   Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#
+
+
+class SystemNameIndex:
+    """lookup of (abbreviated) System-Names, as they are used in chat.
+
+    Built once per Map, a lookup only costs the length of the word:
+    - the full name ("1DQ1-A")
+    - a word of 2 to 4 characters is the beginning of a name ("1DQ")
+    - a word with a dash matches the first characters of both parts of a name
+      ("I-I" for "I43-IF3")
+    - any other word is the beginning of the name without its dash ("FYH5")
+    If a word fits several names, the first in alphabetical order is used.
+    Only names are stored, so the index can be handed to other processes.
+    """
+
+    def __init__(self, names):
+        self.names = frozenset(names)
+        # beginning of a name -> name
+        self.prefixes = {}
+        # initials of both parts of a dashed name -> name
+        self.dash_initials = {}
+        # beginning of a name without dash -> name
+        self.stripped_prefixes = {}
+        for name in sorted(self.names, reverse=True):
+            # in reverse, so the first name alphabetically is kept
+            for length in range(2, min(len(name), 4) + 1):
+                self.prefixes[name[:length]] = name
+            parts = name.split("-")
+            if len(parts) == 2 and len(parts[0]) > 1 and len(parts[1]) > 1:
+                self.dash_initials[(parts[0][0], parts[1][0])] = name
+            stripped = name.replace("-", "")
+            for length in range(2, len(stripped) + 1):
+                self.stripped_prefixes[stripped[:length]] = name
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def resolve(self, word: str) -> str:
+        """the System-Name a word stands for
+
+        :param word: the word in UPPER CASE
+        :return: the name of the System, None if it doesn't stand for one
+        """
+        if word in self.names:
+            return word
+        if 1 < len(word) < 5:
+            return self.prefixes.get(word)
+        if "-" in word and len(word) > 2:
+            parts = word.split("-")
+            if len(parts) == 2 and len(parts[0]) > 1 and len(parts[1]) > 1:
+                return self.dash_initials.get((parts[0][0], parts[1][0]))
+            return None
+        if len(word) > 1:
+            return self.stripped_prefixes.get(word)
+        return None
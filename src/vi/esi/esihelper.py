@@ -18,7 +18,12 @@
 
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from vi.chat.pilotmatcher import KnownPilots
+from vi.chat.shipmatcher import ShipMatcher
 from vi.esi.esiinterface import EsiInterface
+from vi.esi.namecache import NotCharacterCache
 from vi.cache.cache import Cache
 
 LOGGER = logging.getLogger(__name__)
@@ -27,6 +32,20 @@ LOGGER = logging.getLogger(__name__)
 class EsiHelper:
     _ShipsUpper = {}
     _Ships = {}
+    _ship_matcher = None
+    _lock = threading.Lock()
+    # fetching Character-Records concurrently
+    _character_executor = None
+    CHARACTER_FETCHERS = 4
+    # learning pilots in the background, and the names being looked up
+    _pilot_executor = None
+    _pilots_pending = set()
+    # ESI resolves up to this many names in one call
+    MAX_NAMES_PER_CALL = 500
+    # names ESI didn't find before
+    not_characters = NotCharacterCache()
+    # names ESI confirmed as Character
+    known_pilots = KnownPilots()
 
     def __init__(self):
         self.esi = EsiInterface()
@@ -58,6 +77,90 @@ class EsiHelper:
                     return character
         return {}
 
+    def checkPlayerNames(self, characterNames: list) -> dict:
+        """resolve many names at once, one call to ESI for up to 500 names.
+
+        Only names matching a Character exactly (same as checkPlayerName) count,
+        the records of those are fetched concurrently. Names ESI didn't find
+        are remembered and not asked for again (see NotCharacterCache), the
+        ones found are added to known_pilots.
+        :return: dict {name: character}, for the names found
+        """
+        names = sorted(self.not_characters.unknown(set(characterNames)))
+        wanted = set(names)
+        found = {}
+        answered = []
+        for start in range(0, len(names), self.MAX_NAMES_PER_CALL):
+            chunk = names[start : start + self.MAX_NAMES_PER_CALL]
+            try:
+                resp = self.esi.getIdsByNames(chunk)
+            except Exception as e:
+                LOGGER.warning("Unable to resolve %d names: %r", len(chunk), e)
+                continue
+            if not isinstance(resp, dict) or "error" in resp:
+                # no answer, can't tell which aren't Characters
+                continue
+            answered.extend(chunk)
+            for character in resp.get("characters", []):
+                if character["name"] in wanted:
+                    found[character["name"]] = character["id"]
+        self.not_characters.add([name for name in answered if name not in found])
+        if not found:
+            return {}
+        for name, charid in found.items():
+            self.known_pilots.add(name, charid)
+        if EsiHelper._character_executor is None:
+            with EsiHelper._lock:
+                if EsiHelper._character_executor is None:
+                    EsiHelper._character_executor = ThreadPoolExecutor(
+                        self.CHARACTER_FETCHERS, thread_name_prefix="EsiCharacter"
+                    )
+        fetches = {
+            name: EsiHelper._character_executor.submit(self.esi.getCharacter, charid)
+            for name, charid in found.items()
+        }
+        characters = {}
+        for name, future in fetches.items():
+            try:
+                character = future.result()
+            except Exception as e:
+                LOGGER.warning('Unable to fetch the character "%s": %r', name, e)
+                continue
+            if character:
+                character["id"] = found[name]
+                characters[name] = character
+        return characters
+
+    def learn_pilots(self, characterNames: list):
+        """add the Characters to known_pilots, asking ESI in the background
+
+        The lookups run one after the other, names already being looked up
+        aren't asked for again.
+        """
+        with EsiHelper._lock:
+            names = [
+                name
+                for name in set(characterNames)
+                if name not in self.known_pilots and name not in EsiHelper._pilots_pending
+            ]
+            if not names:
+                return
+            EsiHelper._pilots_pending.update(names)
+            if EsiHelper._pilot_executor is None:
+                EsiHelper._pilot_executor = ThreadPoolExecutor(
+                    1, thread_name_prefix="EsiLearnPilots"
+                )
+        EsiHelper._pilot_executor.submit(self._learn_pilots, names)
+
+    def _learn_pilots(self, names: list):
+        try:
+            self.checkPlayerNames(names)
+        except Exception as e:
+            LOGGER.warning("Unable to learn %d pilots: %r", len(names), e)
+        finally:
+            with EsiHelper._lock:
+                EsiHelper._pilots_pending.difference_update(names)
+
     def getSystemStatistics(self) -> dict:
         try:
             jumpData = {}
@@ -106,6 +209,19 @@ class EsiHelper:
                 self._Ships[str(ship["name"])] = ship
         return self._Ships
 
+    @property
+    def ship_matcher(self) -> ShipMatcher:
+        """the Ship-Names with their Group-Names, built once and kept in memory
+        """
+        if EsiHelper._ship_matcher is None:
+            with EsiHelper._lock:
+                if EsiHelper._ship_matcher is None:
+                    EsiHelper._ship_matcher = ShipMatcher(
+                        self.esi.getShipList, self.esi.getShipGroupNames
+                    )
+                    LOGGER.debug("Ship-Matcher holds %d Ships", len(EsiHelper._ship_matcher))
+        return EsiHelper._ship_matcher
+
     def getShipId(self, shipName: str) -> int:
         try:
             ship = self.ShipsUpper[shipName.upper()]
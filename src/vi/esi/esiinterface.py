@@ -361,12 +361,13 @@ class EsiInterface(metaclass=EsiInterfaceType):
             return self._allowCallToEsi(force_disable=True)
         return True
 
-    def _getResponse(self, operation, cache_expiry_secs, **kwargs):
+    def _getResponse(self, operation, cache_expiry_secs, use_cache: bool = True, **kwargs):
         """
         Do a Swagger-Call to ESI-Api if we can't find the information in Cache
         if we found some data, store it in Cache for a given expiry, or until downtime
         :param operation: str
         :param cache_expiry_secs: int
+        :param use_cache: bool: False to always ask ESI and not store the answer
         :param kwargs: dict
         :return: Response
         """
@@ -374,7 +375,7 @@ class EsiInterface(metaclass=EsiInterfaceType):
         for key in kwargs.keys():
             cache_key = "_".join((cache_key, str(kwargs[key])))
         # check if we have it in Cache
-        response = self.cache.fetch(cache_key)
+        response = self.cache.fetch(cache_key) if use_cache else None
         if not response:
             try:
                 # call the Swagger interface
@@ -394,9 +395,11 @@ class EsiInterface(metaclass=EsiInterfaceType):
                     # some items in the response may not be storable... so make a storable copy
                     response = self._copyModel(response.data)
                     # save data in Cache
-                    self.cache.put(cache_key, response, cache_expiry_secs)
+                    if use_cache:
+                        self.cache.put(cache_key, response, cache_expiry_secs)
             except Exception as e:
-                self.cache.delete(cache_key)
+                if use_cache:
+                    self.cache.delete(cache_key)
                 self.LOGGER.error(
                     "Error executing Operation [%s] %r" % (operation, kwargs), e
                 )
@@ -454,6 +457,17 @@ class EsiInterface(metaclass=EsiInterfaceType):
             "get_search", None, categories="character", search=charname, strict=strict
         )
 
+    def getIdsByNames(self, names: list) -> Response.data:
+        """
+        resolve a list of Names (of Characters, Corporations, Systems, ...) in one call.
+        only exact matches (ignoring case) are returned
+        :param names: list of str, not more than 500
+        :return: Response.data
+                 format is {"characters": [{"id": xx, "name": xx}, ...], "corporations": [...], ...}
+        """
+        # every list of names is different, the answers are kept per name elsewhere
+        return self._getResponse("post_universe_ids", None, use_cache=False, names=names)
+
     def getCharacterAvatar(self, characterId: int) -> Response.data:
         """
         for a given Character-ID return the Avatar-List
@@ -564,6 +578,30 @@ class EsiInterface(metaclass=EsiInterfaceType):
             raise
         return ships
 
+    @property
+    def getShipGroupNames(self) -> dict:
+        """
+        Property to return the names of all Ship-Groups
+        :return: dict
+                 format is {group_id: name, ...}
+        """
+        cacheKey = "_".join(("esicache", "getshipgroupnames"))
+        group_names = self.cache.get(cacheKey)
+        try:
+            if group_names is None or len(group_names) == 0:
+                self.LOGGER.debug("Loading Ship-Groups...")
+                group_names = {}
+                shipgroup = self.getShipGroups()
+                for group in shipgroup["groups"]:
+                    group_names[group] = self.getShipGroupTypes(group)["name"]
+                self.cache.set(cacheKey, group_names)
+                self.LOGGER.debug("Loading Ship-Groups...complete")
+        except Exception as e:
+            self.cache.invalidate(cacheKey)
+            self.LOGGER.error("Error retrieving Ship-Groups from ESI", e)
+            raise
+        return group_names
+
     def currentEveTime(self) -> datetime.datetime:
         """
         Returns the current eve-time as a datetime.datetime
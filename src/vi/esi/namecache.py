@@ -0,0 +1,104 @@
+#  Vintel - Visual Intel Chat Analyzer
+#  Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import logging
+import threading
+import time
+
+from vi.cache.cache import Cache, CacheError
+
+
+class NotCharacterCache:
+    """names ESI doesn't know as Character ("gate", "on undock", ...).
+
+    Held in memory, and in the Cache-Database so they survive a restart. A
+    name is asked again once it is older than max_age, someone might have
+    created such a Character in the meantime, it is dropped when looked up then.
+    hits: names answered from here, misses: names which had to be asked.
+    """
+
+    # three days
+    MAX_AGE = 60 * 60 * 24 * 3
+
+    def __init__(self, max_age: int = MAX_AGE):
+        self.LOGGER = logging.getLogger(__name__)
+        self.max_age = max_age
+        # name -> epoch-seconds when it was stored
+        self.names = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            cache = Cache()
+            cache.prune_not_characters(self.max_age)
+            self.names = cache.get_not_characters(self.max_age)
+        except CacheError as e:
+            self.LOGGER.error("Unable to load the names which aren't Characters: %r", e)
+            self.names = {}
+        self.LOGGER.debug("%d names known not to be Characters", len(self.names))
+
+    def __len__(self):
+        with self._lock:
+            return len(self.names) if self.names is not None else 0
+
+    def unknown(self, names: list) -> list:
+        """drop the names known not to be a Character, counting hits and misses
+
+        :return: the names still to be asked for
+        """
+        now = time.time()
+        with self._lock:
+            if self.names is None:
+                self._load()
+            result = []
+            for name in names:
+                stored = self.names.get(name)
+                if stored is not None and now - stored < self.max_age:
+                    self.hits += 1
+                    continue
+                if stored is not None:
+                    # expired, to be asked again
+                    del self.names[name]
+                self.misses += 1
+                result.append(name)
+            return result
+
+    def add(self, names: list):
+        """remember the names as not being a Character
+        """
+        if not names:
+            return
+        now = time.time()
+        with self._lock:
+            if self.names is None:
+                self._load()
+            for name in names:
+                self.names[name] = now
+        try:
+            Cache().put_not_characters(names)
+        except CacheError as e:
+            self.LOGGER.error("Unable to store the names which aren't Characters: %r", e)
+
+    def statistics(self) -> dict:
+        with self._lock:
+            return {
+                "names": len(self.names) if self.names is not None else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -223,6 +223,9 @@ class GeneralSettings(_Settings):
             "alarm_distance": 2,
             "background_color": "#ffffff",
             "map_update_interval": 4 * 1000,
+            "message_batch_interval": 250,
+            "archive_logs": False,
+            "archive_age": 60 * 60 * 24 * 7,
             "sound_active": True,
             "show_requests": True,
             "log_level": 10,
@@ -349,6 +352,33 @@ class GeneralSettings(_Settings):
         v = {"message_expiry": int(value)}
         self.setting = v
 
+    @property
+    def archive_logs(self) -> bool:
+        return bool(self.setting["archive_logs"])
+
+    @archive_logs.setter
+    def archive_logs(self, value: bool):
+        v = {"archive_logs": bool(value)}
+        self.setting = v
+
+    @property
+    def archive_age(self) -> int:
+        return int(self.setting["archive_age"])
+
+    @archive_age.setter
+    def archive_age(self, value: int):
+        v = {"archive_age": int(value)}
+        self.setting = v
+
+    @property
+    def message_batch_interval(self) -> int:
+        return int(self.setting["message_batch_interval"])
+
+    @message_batch_interval.setter
+    def message_batch_interval(self, value: int):
+        v = {"message_batch_interval": int(value)}
+        self.setting = v
+
     @property
     def map_update_interval(self) -> int:
         return int(self.setting["map_update_interval"])
@@ -255,12 +255,11 @@ class TrayContextMenu(QtWidgets.QMenu):
 
 if __name__ == "__main__":
     import sys
-    import datetime
     from PyQt5.Qt import QApplication
 
     a = QApplication(sys.argv)
     d = TrayIcon(a)
     d.show()
-    msg = Message("room", "message", datetime.datetime.now(), "Zedan")
+    msg = Message("room", "message", time.time(), "Zedan")
     d.showNotification(msg, "Earth", "Zedan", 3)
     sys.exit(a.exec_())
@@ -21,4 +21,5 @@ from .chattidyup import ChatTidyUpThread
 from .avatar import AvatarThread
 from .mapupdate import MapUpdateThread
 from .filewatcher import FileWatcherThread
+from .logarchiver import LogArchiverThread
 from .kostchecker import KOSCheckerThread
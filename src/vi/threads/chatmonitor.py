@@ -16,76 +16,56 @@
 #
 #
 
-import asyncio
 import datetime
 import logging
+import multiprocessing
 import os
-import threading
-from queue import Queue
-from threading import Thread
-from typing import Dict
+import time
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty, Queue
 
 import six
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from vi.cache.cache import Cache, CacheError
+from vi.chat.backlog import BacklogRecord, parse_backlog
 from vi.chat.chatmessage import Message
-from vi.chat.messageparser import MessageParser, parse_line
+from vi.chat.duplicates import DuplicateStore
+from vi.chat.logreader import LogTailReader
+from vi.chat.merger import ReorderBuffer
+from vi.chat.messageparser import MessageParser, split_line
+from vi.chat.refinestage import RefineStage
+from vi.chat.richtext import RichText
+from vi.chat.roomhistory import RoomHistory
 from vi.dotlan import system as systems
+from vi.dotlan.systemindex import SystemNameIndex
 from vi.logger.mystopwatch import ViStopwatch
 from vi.settings.settings import ChatroomSettings, GeneralSettings
 from vi.states import State
+from vi.threads.workerpool import SerialQueue, WorkerPool
 
-chat_thread_lock = threading.RLock()
 ALL_MESSAGES_MAX_AGE = 1200
-__all_known_messages: Dict[str, datetime.datetime] = {}
+__all_known_messages = DuplicateStore(ALL_MESSAGES_MAX_AGE)
 
 
-def chat_search_key(message: Message):
-    return "%s%s%s" % (message.plainText, message.user, message.room)
+def chat_search_key(room: str, user: str, text: str) -> str:
+    return "%s%s%s" % (text, user, room)
 
 
-def chat_thread_all_messages_contains(message: Message) -> bool:
+def chat_thread_all_messages_add(
+    room: str, user: str, text: str, timestamp: float
+) -> bool:
     """
-    check if message is stored in the array
-    only use vital information (ignore Timestamp)
-    :param message:
-    :return:
+    remember a message, unless it is already stored
+    only use vital information (timestamp within a second)
+    :param room: chat-room of the log-file
+    :param user: who posted the message
+    :param text: the message as found in the log-line
+    :param timestamp: epoch-seconds of the log-line
+    :return: False if this is a duplicate
     """
-    global __all_known_messages, chat_thread_lock
-    # chat_thread_lock.acquire()
-    hit = False
-    search = chat_search_key(message)
-    if search in __all_known_messages.keys():
-        diff = (__all_known_messages[search] - message.timestamp).total_seconds()
-        if -1 <= diff <= 1:
-            logging.getLogger(__name__).debug(
-                'chat_message_contains: duplicate found in search for "%s" (age %f)'
-                % (search, diff,)
-            )
-            hit = True
-    # chat_thread_lock.release()
-    return hit
-
-
-def _chat_thread_all_messages_tidy_up():
-    global __all_known_messages, ALL_MESSAGES_MAX_AGE
-    ts = datetime.datetime.now()
-    for key, message_time in list(__all_known_messages.items()):
-        if (ts - message_time).total_seconds() > ALL_MESSAGES_MAX_AGE:
-            del __all_known_messages[key]
-
-
-def chat_thread_all_messages_add(message: Message) -> bool:
-    global __all_known_messages, chat_thread_lock
-    # chat_thread_lock.acquire()
-    added = True
-    if not chat_thread_all_messages_contains(message):
-        __all_known_messages[chat_search_key(message)] = message.timestamp
-        _chat_thread_all_messages_tidy_up()
-    else:
-        added = False
-    # chat_thread_lock.release()
-    return added
+    return __all_known_messages.add(chat_search_key(room, user, text), timestamp)
 
 
 LOCAL_NAMES = (
@@ -100,10 +80,21 @@ parsed for any significant messages which need to be pushed to the system.
 This thread is an attempt, to handle the Log-File change outside the UI, queue all the
 result Messages and pop them on a Queue for the UI to pick up and send off
 Flow:
-- Create THIS (main Thread) listening for changes in Log-Files being emitted, on each "emit"
-  a new Thread gets created to handle the Log-File process. This way, multiple files can
-  change at the same time and not stop any other processes from doing their stuff. This means
-  that a separate Thread is created per Log-File
+- Create THIS (main Thread) listening for changes in Log-Files being emitted. It owns all
+  Log-Files (one ChatLogProcessor each) and reads what was appended to a changed file.
+  Parsing and refining of the new lines is handed to a small WorkerPool, which is shared
+  by all Log-Files, so the number of Threads stays the same, no matter how many Log-Files
+  are monitored. The lines of one Log-File are still processed in order
+- On opening a Log-File with a large backlog (i.e. on startup), the backlog is parsed
+  in child-processes. Once all outstanding backlogs are back, they are merged in
+  timestamp order and handed on as if they had just been read
+- New Messages of all Log-Files are held back briefly (REORDER_WINDOW) and merged, so they
+  reach the UI in timestamp order, no matter which Log-File was processed first
+- Refining is queued by priority: Messages about systems near an active character
+  first, then the ones of the intel rooms, then the rest (i.e. Local)
+- Refining a Message runs in stages with a time budget each (RefineStage). The local
+  ones are shown at once, the ones asking ESI run on the network pool and update the
+  Message when they are done in time, late ones are dropped
 - Log-File changed
 -- create a new Chatwidget
 -- populate the Widget with links
@@ -113,11 +104,32 @@ Flow:
 class ChatMonitorThread(QThread):
     """Super-Class to monitor all file changes.
     Thread to react if the File-Watcher-Thread encounters any changes
-    This will direct the change to the correct processing Thread-Queue
+    This will read the new lines and hand them to the Worker-Pool for processing
     """
 
+    WORKER_THREADS = 4
+    # threads waiting for ESI, for the refine stages doing network calls
+    NETWORK_THREADS = 4
+    # order of refining on the pools, parsing goes first (WorkerPool.DEFAULT_PRIORITY)
+    PRIORITY_NEARBY = 1  # mentions a system within alarm distance of an active character
+    PRIORITY_INTEL = 2  # posted in a monitored intel room
+    PRIORITY_OTHER = 3
+    PRIORITY_NAMES = {
+        WorkerPool.DEFAULT_PRIORITY: "parse",
+        PRIORITY_NEARBY: "nearby",
+        PRIORITY_INTEL: "intel",
+        PRIORITY_OTHER: "other",
+    }
+    # child-processes parsing the backlog of newly opened Log-Files
+    BACKLOG_PROCESSES = 2
+    LOG_INDEX_MAX_AGE = 60 * 60 * 24
+    # Messages of all Log-Files are held back this long (seconds), to be put in order
+    REORDER_WINDOW = 0.5
     player_added_signal = pyqtSignal(list)
-    message_added_signal = pyqtSignal(Message)
+    # new Messages are handed out in batches, so the UI renders once per batch
+    messages_added_signal = pyqtSignal(list)
+    # a Log-File superseded by a newer session of the same character and room
+    log_file_retired = pyqtSignal(str)
     message_updated_signal = pyqtSignal(Message)
 
     def __init__(
@@ -131,10 +143,30 @@ class ChatMonitorThread(QThread):
         self.dotlan_systems = {}
         if dotlan_systems:
             self.dotlan_systems = dotlan_systems
+        self.system_index = SystemNameIndex(self.dotlan_systems.keys())
         self.process_pool = {}
+        # the live session (Log-File) by (room, character)
+        self.sessions = {}
+        # recent Messages by room
+        self.room_histories = {}
+        self.worker_pool = WorkerPool(self.WORKER_THREADS, "ChatWorker")
+        self.network_pool = WorkerPool(self.NETWORK_THREADS, "ChatNetwork")
+        # names of the systems within alarm distance of the active characters
+        self.watched_systems = frozenset()
+        self.backlog_executor = None
+        # outstanding backlogs by Log-File
+        self.backlog_futures = {}
+        self.cache = Cache()
         self.known_players = []
         if known_players:
             self.known_players = known_players
+        # Messages of all Log-Files, merged by timestamp
+        self.merger = ReorderBuffer(self.REORDER_WINDOW)
+        # Messages in order, waiting for the batch-window to close
+        self.pending_messages = []
+        self.last_flush = 0.0
+        # seconds, see update_batch_interval
+        self.batch_interval = 0.0
 
     @property
     def room_names(self):
@@ -153,44 +185,215 @@ class ChatMonitorThread(QThread):
             self.known_players.append(player_name)
             self.player_added_signal.emit(self.known_players)
 
-    def update_dotlan_systems(self, dotlan_systems: systems):
+    def update_dotlan_systems(
+        self, dotlan_systems: systems, system_index: SystemNameIndex = None
+    ):
         self.LOGGER.debug("Informing Chat-Threads of new System")
+        if system_index is None:
+            system_index = SystemNameIndex(dotlan_systems.keys())
+        self.system_index = system_index
         self.dotlan_systems = dotlan_systems
-        for thread in self.process_pool.keys():
-            self.process_pool[thread].update_dotlan_systems(self.dotlan_systems)
+        for processor in list(self.process_pool.values()):
+            processor.update_dotlan_systems(self.dotlan_systems)
 
     def _tidy_logs(self):
-        for path in self.process_pool.keys():
+        for path in list(self.process_pool.keys()):
             room = os.path.basename(path)[:-20]
             if room not in self.room_names:
                 self.add_log_file(path, True)
 
+    def update_batch_interval(self):
+        """read the batch-interval from the Settings, again after they changed
+        """
+        self.batch_interval = GeneralSettings().message_batch_interval / 1000.0
+
     def message_added(self, message: Message):
-        with chat_thread_lock:
-            if chat_thread_all_messages_add(message):
-                self.message_added_signal.emit(message)
+        if self.merger.push(message.timestamp, message):
+            # wake the reactor, so it knows when to release the Message
+            self.add_log_file()
+
+    def _flush_messages(self):
+        batch, self.pending_messages = self.pending_messages, []
+        self.last_flush = time.time()
+        if batch:
+            self.LOGGER.debug(
+                "Notify %d new messages, waiting: %r", len(batch), self.queue_depths()
+            )
+            self.messages_added_signal.emit(batch)
+
+    def _next_timeout(self) -> float:
+        due = self.merger.next_due()
+        if self.pending_messages:
+            batch_due = self.last_flush + self.batch_interval
+            due = batch_due if due is None else min(due, batch_due)
+        if due is None:
+            return None
+        return max(0.0, due - time.time())
 
     def message_updated(self, message: Message):
         self.message_updated_signal.emit(message)
 
+    def set_watched_systems(self, system_names: list):
+        """the systems within alarm distance of the active characters, refined first
+        """
+        self.watched_systems = frozenset(system_names)
+
+    def refine_priority(self, processor: "ChatLogProcessor", message: Message) -> int:
+        watched = self.watched_systems
+        for system in message.systems:
+            if getattr(system, "name", system) in watched:
+                return self.PRIORITY_NEARBY
+        if not processor.local_room:
+            return self.PRIORITY_INTEL
+        return self.PRIORITY_OTHER
+
+    def queue_depths(self) -> dict:
+        """number of tasks waiting on the pools, by priority
+        """
+        return {
+            pool_name: {
+                self.PRIORITY_NAMES.get(priority, priority): depth
+                for priority, depth in pool.depths().items()
+            }
+            for pool_name, pool in (
+                ("worker", self.worker_pool),
+                ("network", self.network_pool),
+            )
+        }
+
+    def submit_backlog(self, processor: "ChatLogProcessor", start: int, end: int):
+        """parse the backlog of the Log-File in a child-process
+        """
+        if self.backlog_executor is None:
+            # a forked Qt-Application is asking for trouble
+            self.backlog_executor = ProcessPoolExecutor(
+                self.BACKLOG_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+        future = self.backlog_executor.submit(
+            parse_backlog,
+            processor.log_file,
+            start,
+            end,
+            processor.roomname,
+            processor.charname,
+            processor.local_room,
+            processor.message_age,
+            self.system_index,
+        )
+        self.backlog_futures[processor.log_file] = future
+        # wake the reactor, once the result is in
+        future.add_done_callback(lambda f: self.add_log_file())
+
+    def _merge_backlog(self):
+        """hand on the parsed backlogs of all Log-Files in timestamp order
+        """
+        futures, self.backlog_futures = self.backlog_futures, {}
+        results = []
+        for logfile, future in futures.items():
+            processor = self.process_pool.get(logfile)
+            if not processor:
+                continue
+            try:
+                offset, records = future.result()
+            except Exception as e:
+                self.LOGGER.error('Error parsing backlog of "%s": %r', logfile, e)
+                # read it the usual way
+                processor.logfile_changed()
+                continue
+            results.append((processor, offset, records))
+        merged = heapq.merge(
+            *[
+                [(record.timestamp, index, record) for record in records]
+                for index, (processor, offset, records) in enumerate(results)
+            ]
+        )
+        for timestamp, index, record in merged:
+            results[index][0].backlog_record(record)
+        for processor, offset, records in results:
+            processor.backlog_done(offset)
+        if not self.backlog_futures:
+            self.backlog_executor.shutdown(wait=False)
+            self.backlog_executor = None
+
     def start(self, priority: "QThread.Priority" = QThread.NormalPriority) -> None:
+        # forget about Log-Files we haven't seen in a while
+        self.cache.prune_log_index(self.LOG_INDEX_MAX_AGE)
+        self.update_batch_interval()
+        self.worker_pool.start()
+        self.network_pool.start()
         super().start(priority)
 
     def _create_child_process(self, logfile):
-        self.process_pool[logfile] = ChatThreadProcess(logfile, self.dotlan_systems)
-        self.process_pool[logfile].message_added_s.connect(self.message_added)
-        self.process_pool[logfile].message_updated_s.connect(self.message_updated)
-        self.process_pool[logfile].new_player_s.connect(self.add_known_player)
-        self.process_pool[logfile].start()
+        self.process_pool[logfile] = ChatLogProcessor(
+            logfile, self.dotlan_systems, self
+        )
 
     def _remove_child_process(self, logfile):
-        self.process_pool[logfile].quit()
-        self.process_pool.pop(logfile)
+        processor = self.process_pool.pop(logfile)
+        processor.quit()
+        key = (processor.roomname, processor.charname)
+        if self.sessions.get(key) == logfile:
+            del self.sessions[key]
+
+    def room_history(self, roomname: str) -> RoomHistory:
+        if roomname not in self.room_histories:
+            self.room_histories[roomname] = RoomHistory()
+        return self.room_histories[roomname]
+
+    def _register_session(self, processor: "ChatLogProcessor") -> bool:
+        """only keep the newest session of a character in a room, retire the other
+
+        :return: False if the processor itself has been retired
+        """
+        key = (processor.roomname, processor.charname)
+        current = self.process_pool.get(self.sessions.get(key))
+        if current and current is not processor:
+            if (current.session_start, current.log_file) > (
+                processor.session_start,
+                processor.log_file,
+            ):
+                self._retire_log_file(processor.log_file)
+                return False
+            self._retire_log_file(current.log_file)
+        self.sessions[key] = processor.log_file
+        return True
+
+    def _retire_log_file(self, logfile):
+        self.LOGGER.debug('Retiring superseded session "%s"', logfile)
+        self._remove_child_process(logfile)
+        self.log_file_retired.emit(logfile)
+
+    def _logfile_changed(self, logfile):
+        processor = self.process_pool[logfile]
+        if not processor.active:
+            return
+        if not processor.charname:
+            # unusable log-file... stop processing it
+            if not processor.prepare_parser():
+                processor.active = False
+                return
+            if not self._register_session(processor):
+                return
+        processor.logfile_changed()
 
     def run(self):
         while self.active:
-            logfile, delete = self.queue.get()
-            if self.active:
+            try:
+                logfile, delete = self.queue.get(timeout=self._next_timeout())
+            except Empty:
+                logfile, delete = None, False
+            # in global timestamp order, at most one batch per batch-interval
+            self.pending_messages.extend(self.merger.pop_ready())
+            if (
+                self.pending_messages
+                and time.time() >= self.last_flush + self.batch_interval
+            ):
+                self._flush_messages()
+            if self.backlog_futures and all(
+                future.done() for future in self.backlog_futures.values()
+            ):
+                self._merge_backlog()
+            if self.active and logfile:
                 if logfile and logfile not in self.process_pool.keys() and not delete:
                     roomname = os.path.basename(logfile)[:-20]
                     if roomname not in self.room_names and roomname not in LOCAL_NAMES:
@@ -203,7 +406,12 @@ class ChatMonitorThread(QThread):
                 if delete and logfile in self.process_pool.keys():
                     self._remove_child_process(logfile)
                 elif not delete:
-                    self.process_pool[logfile].logfile_changed()
+                    try:
+                        self._logfile_changed(logfile)
+                    except Exception as e:
+                        self.LOGGER.error(
+                            'Error processing change of "%s": %r', logfile, e
+                        )
 
     def quit(self):
         self.LOGGER.debug("Closing Chat-Sub-Thread")
@@ -211,38 +419,60 @@ class ChatMonitorThread(QThread):
             self._remove_child_process(logfile)
         self.LOGGER.debug("Closing Main Chat-Thread")
         self.active = False
+        self.worker_pool.shutdown()
+        self.network_pool.shutdown()
+        if self.backlog_executor:
+            for future in self.backlog_futures.values():
+                future.cancel()
+            self.backlog_executor.shutdown(wait=False)
         # get out of the queue
         self.add_log_file()
         super().quit()
 
 
-class ChatThreadProcess(QThread):
+class ChatLogProcessor:
+    """everything needed to process one Log-File.
+
+    The ChatMonitorThread reads the appended lines, which are parsed on its
+    Worker-Pool, the refining of the Messages is done there as well.
+    """
+
     OLDEST_MESSAGE = 300
-    new_player_s = pyqtSignal(str)
-    message_added_s = pyqtSignal(Message)
-    message_updated_s = pyqtSignal(Message)
+    # a backlog at least this large (bytes) is parsed in a child-process
+    BACKLOG_MIN_SIZE = 32 * 1024
+    # store the processing state at most this often (seconds)
+    CHECKPOINT_INTERVAL = 10
+    # seconds refining a Message may take, for the local and the ESI stage
+    LOCAL_BUDGET = 0.1
+    ESI_BUDGET = 5.0
 
     def __init__(
-        self, log_file_path: str, dotlan_systems: systems,
+        self, log_file_path: str, dotlan_systems: systems, monitor: ChatMonitorThread
     ):
-        super().__init__()
         self.LOGGER = logging.getLogger(__name__)
-        self.queue = Queue()
         self.log_file = log_file_path
         self.dotlan_systems = dotlan_systems
-        self.active = False
+        self.monitor = monitor
+        self.active = True
         self.charname = None
         self.roomname = None
         self.message_parser = None
         self.session_start = None
-        self.parsed_lines = 0
+        self.reader = LogTailReader(log_file_path)
+        # byte-offset up to which all lines have been processed
+        self.processed_offset = 0
+        self.checkpoint_time = 0.0
+        # when set, ignore the stored checkpoint and read the whole file again
+        self.rescan = False
+        # nothing read since the parser has been prepared
+        self.first_read = False
         self.local_room = False
-        self.knownMessages = []
+        # recent Messages of the room, shared by all Log-Files of the room
+        self.history = None
         # locations of this character
         self.locations = {}
-        self.worker_loop = asyncio.new_event_loop()
-        self.worker = Thread(target=self._run_loop)
-        self.worker.start()
+        # lines are parsed in order, refining may lag behind, by priority
+        self.parse_queue = SerialQueue(monitor.worker_pool)
 
     @property
     def ship_scanner(self):
@@ -259,65 +489,166 @@ class ChatThreadProcess(QThread):
     def update_dotlan_systems(self, dotlan_systems: systems):
         self.dotlan_systems = dotlan_systems
         # required to rescan all files, so map gets redrawn with current data
+        if self.charname:
+            self.rescan = True
         self.charname = None
 
+    def _save_checkpoint(self, force: bool = False):
+        now = time.time()
+        if not self.charname or not self.reader.stat:
+            return
+        if not force and now - self.checkpoint_time < self.CHECKPOINT_INTERVAL:
+            return
+        self.checkpoint_time = now
+        try:
+            self.monitor.cache.put_log_index(
+                self.log_file,
+                self.reader.stat.st_ino,
+                self.reader.stat.st_size,
+                self.reader.stat.st_mtime,
+                self.charname,
+                self.roomname,
+                self.session_start.timestamp(),
+                self.processed_offset,
+            )
+        except CacheError as e:
+            self.LOGGER.error("Unable to store checkpoint of %s: %r", self.log_file, e)
+
+    def _resume_from_checkpoint(self) -> bool:
+        """continue where we stopped processing the last time Vintel was running
+
+        :return: True if a usable checkpoint was found
+        """
+        try:
+            index = self.monitor.cache.get_log_index(self.log_file)
+            if not index:
+                return False
+            file_stat = os.stat(self.log_file)
+        except (CacheError, OSError) as e:
+            self.LOGGER.warning("No checkpoint for %s: %r", self.log_file, e)
+            return False
+        # same file, which only has been appended to since?
+        if (
+            file_stat.st_ino != index["inode"]
+            or file_stat.st_size < index["size"]
+            or file_stat.st_mtime < index["mtime"]
+            or index["offset"] > file_stat.st_size
+        ):
+            return False
+        self.charname = index["charname"]
+        self.session_start = datetime.datetime.fromtimestamp(
+            index["session_start"], tz=datetime.timezone.utc
+        )
+        # what was written while we were away may be too old by now
+        offset = self.reader.seek_first(index["offset"], self._is_recent)
+        self.reader.reset(offset)
+        self.reader.inode = file_stat.st_ino
+        self.processed_offset = offset
+        self.LOGGER.debug(
+            "Resuming %s at offset %d", self.log_file, self.processed_offset
+        )
+        return True
+
+    def _refine_stages(self) -> list:
+        stages = [
+            RefineStage(
+                "Ships, URLs and known pilots",
+                lambda message: self.message_parser.detail_spans(
+                    message, ships=self.ship_scanner, charnames=self.character_scanner
+                ),
+                self.LOCAL_BUDGET,
+            )
+        ]
+        if self.character_scanner:
+            # the rest of the words might be Pilots not known yet
+            stages.append(
+                RefineStage(
+                    "Ask ESI for character names",
+                    self.message_parser.unknown_charname_spans,
+                    self.ESI_BUDGET,
+                    network=True,
+                )
+            )
+        return stages
+
     def _refine_message(self, message: Message):
+        if not self.active:
+            return
+        started = time.time()
+        stages = self._refine_stages() if message.rtext is not None else []
         sw = ViStopwatch()
         with sw.timer("'{}'".format(message.plainText)):
-            if self.ship_scanner:
-                with sw.timer("Ship-Scanner"):
-                    self.message_parser.process_ships(message)
-            with sw.timer("Search URLs"):
-                self.message_parser.process_urls(message)
-            if self.character_scanner:
-                with sw.timer("Scan character names"):
-                    self.message_parser.process_charnames(message)
-
-            # If message says clear and no system? Maybe an answer to a request?
-            if message.status == State["CLEAR"] and not message.systems:
-                max_search = 4  # we search only max_search messages in the room
-                for count, oldMessage in enumerate(
-                    oldMessage
-                    for oldMessage in self.knownMessages[-1::-1]
-                    if oldMessage.room == self.roomname
-                ):
-                    if oldMessage.systems and oldMessage.status == State["REQUEST"]:
-                        for system in oldMessage.systems:
-                            message.systems.append(system)
-                        break
-                    if count > max_search:
-                        self.LOGGER.warning(
-                            "parseOldMessages excessive runs on %r", message.rtext
-                        )
-                        break
-            message.message = six.text_type(message.rtext)
-            # multiple clients?
-            self.knownMessages.append(message)
-            with sw.timer("mark Systems"):
-                if message.systems:
-                    for system in message.systems:
-                        try:
-                            system.add_message(message)
-                        except AttributeError as e:
-                            self.LOGGER.error("Adding %r to System %r: %r", message, system, e)
-
-            self.message_updated_s.emit(message)
+            for stage in stages:
+                if not stage.network:
+                    with sw.timer(stage.name):
+                        spans = stage.run(message, started)
+                    message.rtext.add_spans(spans)
+            if message.rtext is not None:
+                message.message = message.rtext.html
+            self.monitor.message_updated(message)
         self.LOGGER.debug(sw.get_report())
+        # the slow ones publish what they found when they are done
+        for stage in stages:
+            if stage.network:
+                self.monitor.network_pool.submit_with_priority(
+                    self.monitor.refine_priority(self, message),
+                    self._run_network_stage,
+                    stage,
+                    message,
+                    started,
+                )
+
+    def _record_message(self, message: Message):
+        """add the Message to the history of the room and to its Systems
+
+        Done in the order the Messages were written, a CLEAR has to see the
+        REQUEST it answers. Only the refining runs out of order.
+        """
+        # If message says clear and no system? Maybe an answer to a request?
+        if message.status == State["CLEAR"] and not message.systems:
+            request = self.history.answered_request()
+            if request:
+                for system in request.systems:
+                    message.systems.append(system)
+        self.history.add(message)
+        for system in message.systems:
+            try:
+                system.add_message(message)
+            except AttributeError as e:
+                self.LOGGER.error("Adding %r to System %r: %r", message, system, e)
+
+    def _submit_refine(self, message: Message, func, *args):
+        self.monitor.worker_pool.submit_with_priority(
+            self.monitor.refine_priority(self, message), func, message, *args
+        )
 
-    def _run_loop(self):
-        asyncio.set_event_loop(self.worker_loop)
-        self.worker_loop.run_forever()
+    def _run_network_stage(self, stage: RefineStage, message: Message, started: float):
+        if not self.active:
+            return
+        spans = stage.run(message, started)
+        if spans:
+            # back in line with the other refining
+            self._submit_refine(message, self._publish_spans, spans)
+
+    def _publish_spans(self, message: Message, spans: list):
+        if self.active and message.rtext.add_spans(spans):
+            message.message = message.rtext.html
+            self.monitor.message_updated(message)
 
     # get all the relevant information which ChatParser requires
-    def _prepare_parser(self) -> bool:
+    def prepare_parser(self) -> bool:
         self.LOGGER.debug("Analysing relevance of %s", self.log_file)
         filename = os.path.basename(self.log_file)
         self.roomname = filename[:-20]
         if self.roomname in LOCAL_NAMES:
             self.local_room = True
-        lines = self._get_lines()
+        self.first_read = True
+        if not self.rescan and self._resume_from_checkpoint():
+            return self._register_parser()
+        self.rescan = False
+        header_end = 0
         # for local-chats we need more infos
-        for line in lines:
+        for next_start, line in self.reader.head_lines():
             if "Listener:" in line:
                 self.charname = line[line.find(":") + 1 :].strip()
             elif "Session started:" in line:
@@ -325,6 +656,7 @@ class ChatThreadProcess(QThread):
                 self.session_start = datetime.datetime.strptime(
                     session_str, "%Y.%m.%d %H:%M:%S"
                 ).replace(tzinfo=datetime.timezone.utc)
+            header_end = next_start
             if self.charname and self.session_start:
                 break
         if not self.charname or not self.session_start:
@@ -332,119 +664,168 @@ class ChatThreadProcess(QThread):
                 'File did not contain relevant information: "%s"', self.log_file
             )
             return False
+        self._register_parser()
+        # now head forward until you hit a timestamp, younger then max_age
+        offset = self.reader.seek_first(header_end, self._is_recent)
+        self.reader.reset(offset)
+        self.processed_offset = offset
+        return True
+
+    def _is_recent(self, line: str):
+        parsed = split_line(line.strip())
+        if parsed is None:
+            # header or continuation line
+            return None
+        return time.time() - parsed[0] <= self.message_age
+
+    def _register_parser(self) -> bool:
         # tell the world we're monitoring a new character
-        self.new_player_s.emit(self.charname)
+        self.monitor.add_known_player(self.charname)
+        self.history = self.monitor.room_history(self.roomname)
         self.message_parser = MessageParser(
             self.roomname, self.charname, self.locations, self.local_room
         )
-        # first 13 lines are Header information
-        self.parsed_lines = 12
-        # now head forward until you hit a timestamp, younger then max_age
-        for line in lines[self.parsed_lines :]:
-            if len(str(line).strip(" ")):
-                utctime, username, text, timestamp = parse_line(line)
-                if (
-                    datetime.datetime.utcnow() - utctime
-                ).total_seconds() <= self.message_age:
-                    break
-            self.parsed_lines += 1
         self.LOGGER.debug("Registered %s in %s", self.charname, self.roomname)
         return True
 
-    def _get_lines(self) -> list:
-        try:
-            with open(self.log_file, "r", encoding="utf-16-le") as f:
-                content = f.read()
-            lines = content.split("\n")
-        except Exception as e:
-            self.LOGGER.error(
-                'Failed to read log file "%s" %r', self.log_file, e,
-            )
-            raise e
-        return lines
-
-    def _process_file(self):
+    def _process_lines(self, lines: list, offset: int):
+        if not self.active:
+            return
         sw = ViStopwatch()
         with sw.timer("Process-File for '{}'".format(self.log_file)):
-            lines = self._get_lines()
-            for line in lines[self.parsed_lines :]:
+            for line in lines:
                 line = line.strip()
-                if len(line) > 2:
-                    message = self.message_parser.process(line)
-                    # if self.local_room:
-                    #     message = self._parseLocal(line)
-                    # else:
-                    #     message = self._lineToMessage(line)
-                    if message:
-                        # multiple clients?
-                        with chat_thread_lock:
-                            self.LOGGER.debug(
-                                "%s/%s: Asking for duplicate from %s in %s",
-                                self.roomname,
-                                self.charname,
-                                message.user,
-                                message.room,
-                            )
-                            if chat_thread_all_messages_contains(message):
-                                self.LOGGER.debug(
-                                    "%s/%s: Ignoring message (duplicate) from %s in %s",
-                                    self.roomname,
-                                    self.charname,
-                                    message.user,
-                                    message.room,
-                                )
-                                continue
-                            self.LOGGER.debug(
-                                "%s/%s: Apparently not duplicate from %s in %s",
-                                self.roomname,
-                                self.charname,
-                                message.user,
-                                message.room,
-                            )
-                        # here, I believe, we should add it to the Widget-List and update
-                        # the Map. Hence, we emit the Message
-                        # but ONLY after parsing the System-Status in the Message
-                        self.message_parser.process_systems(
-                            self.dotlan_systems, message
-                        )
-                        self.message_added_s.emit(message)
-                        self.LOGGER.debug(
-                            "%s/%s: Notify new message: %r",
-                            self.roomname,
-                            self.charname,
-                            message,
-                        )
-                        # Thereafter, the Worker-Loop can do the beautifying of the Widget
-                        self.worker_loop.call_soon_threadsafe(
-                            self._refine_message, message
-                        )
+                if len(line) <= 2:
+                    continue
+                parsed = split_line(line)
+                if parsed is None:
+                    self.LOGGER.debug(
+                        "%s/%s: Skipping line without timestamp: %s",
+                        self.roomname,
+                        self.charname,
+                        line,
+                    )
+                    continue
+                timestamp, username, text = parsed
+                if username in ("EVE-System", "EVE System"):
+                    # location changes are per character
+                    username = self.charname
+                # multiple clients? drop the duplicate before any parsing is done
+                if not chat_thread_all_messages_add(
+                    self.roomname, username, text, timestamp
+                ):
+                    self.LOGGER.debug(
+                        "%s/%s: Ignoring message (duplicate) from %s in %s",
+                        self.roomname,
+                        self.charname,
+                        username,
+                        self.roomname,
+                    )
+                    continue
+                message = self.message_parser.process(line, parsed)
+                if message:
+                    # here, I believe, we should add it to the Widget-List and update
+                    # the Map. Hence, we emit the Message
+                    # but ONLY after parsing the System-Status in the Message
+                    self.message_parser.process_systems(
+                        self.dotlan_systems, message, self.monitor.system_index
+                    )
+                    self._record_message(message)
+                    self.monitor.message_added(message)
+                    self.LOGGER.debug(
+                        "%s/%s: Notify new message: %r",
+                        self.roomname,
+                        self.charname,
+                        message,
+                    )
+                    # Thereafter, the Worker-Pool can do the beautifying of the Widget
+                    self._submit_refine(message, self._refine_message)
         self.LOGGER.debug(sw.get_report())
-        self.parsed_lines = len(lines) - 1
-
-    def logfile_changed(self, val=1):
-        self.queue.put(val)
-
-    def start(self, priority: "QThread.Priority" = QThread.NormalPriority):
-        self.active = True
-        super().start(priority)
-
-    def run(self):
-        while self.active:
-            if self.active and not self.charname:
-                # unusable log-file... end thread
-                if not self._prepare_parser():
-                    self.active = False
-                    return
-            self.queue.get()
-            # process the Log-File
-            if self.active:
-                self._process_file()
+        self.processed_offset = offset
+        self._save_checkpoint()
+
+    def backlog_record(self, record: BacklogRecord):
+        """a Log-Line parsed in a child-process, continue as in _process_lines
+        """
+        if not self.active or self.first_read:
+            return
+        # parsed in the child-process already, see BacklogRecord
+        timestamp, text = record.timestamp, record.text
+        if not chat_thread_all_messages_add(
+            self.roomname, record.user, text, timestamp
+        ):
+            return
+        status = State[record.status]
+        if record.spans is None:
+            locations = self.message_parser.locations
+            if timestamp <= locations["timestamp"]:
+                return
+            locations["system"] = record.systems[0]
+            locations["timestamp"] = timestamp
+            rtext = None
+            message_systems = list(record.systems)
+        else:
+            rtext = RichText(text, record.spans)
+            message_systems = [
+                self.dotlan_systems[name]
+                for name in record.systems
+                if name in self.dotlan_systems
+            ]
+        message = Message(
+            self.roomname,
+            record.message,
+            timestamp,
+            record.user,
+            plain_text=text,
+            status=status,
+            rtext=rtext,
+            currsystems=message_systems,
+            upper_text=text.upper(),
+            log_line=record.line,
+        )
+        self._record_message(message)
+        self.monitor.message_added(message)
+        self._submit_refine(message, self._refine_message)
+
+    def backlog_done(self, offset: int):
+        """continue reading after the backlog
+        """
+        if self.first_read:
+            # prepared again in the mean time, start over
+            self.logfile_changed()
+            return
+        self.reader.reset(offset)
+        self.processed_offset = offset
+        self._save_checkpoint(force=True)
+        self.logfile_changed()
+
+    def logfile_changed(self):
+        """read the appended lines and queue them for processing
+        """
+        if self.log_file in self.monitor.backlog_futures:
+            # picked up once the backlog is done
+            return
+        if self.first_read:
+            self.first_read = False
+            try:
+                size = os.stat(self.log_file).st_size
+            except OSError:
+                size = 0
+            if size - self.reader.offset >= self.BACKLOG_MIN_SIZE:
+                self.monitor.submit_backlog(self, self.reader.offset, size)
+                return
+        # only the lines appended since the last call
+        lines = self.reader.read_lines()
+        if lines:
+            self.parse_queue.submit(
+                self._process_lines, lines, self.reader.committed_offset
+            )
 
     def quit(self):
         self.LOGGER.debug("Closing Thread for %s in %s", self.charname, self.roomname)
         self.active = False
-        self.logfile_changed(0)
-        super().quit()
+        self.parse_queue.clear()
+        self._save_checkpoint(force=True)
 
 
 if __name__ == "__main__":
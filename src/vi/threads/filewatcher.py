@@ -15,20 +15,158 @@
 #     along with this program.	 If not, see <http://www.gnu.org/licenses/>.
 #
 #
+import bisect
 import time
 import logging
 import os
 import stat
-import glob
+import threading
+from queue import Queue
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from vi.threads.inotify import (
+    IN_CREATE,
+    IN_DELETE,
+    IN_ISDIR,
+    IN_MODIFY,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    Inotify,
+    inotify_available,
+)
+
+
+class DirectoryIndex:
+    """mtime-ordered index of the regular files within a folder.
+
+    The folder is enumerated with os.scandir and the stat of each DirEntry is kept.
+    If the folder's own mtime has not changed, no files were added or removed and
+    the enumeration is skipped. Since appending to a file does not touch the folder,
+    an enumeration is forced every FULL_REFRESH_INTERVAL seconds anyway, to find old
+    files which are being written to again.
+    """
+
+    FULL_REFRESH_INTERVAL = 30
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.files = {}
+        # (-mtime, path) so the newest file comes first
+        self._ordered = []
+        self._folder_mtime = None
+        self._last_refresh = 0.0
+
+    def __len__(self):
+        return len(self.files)
+
+    def refresh(self, force: bool = False) -> bool:
+        """enumerate the folder, if necessary
+
+        :param force: enumerate regardless of the folder's mtime
+        :return: True if the folder was enumerated
+        """
+        folder_mtime = os.stat(self.folder).st_mtime_ns
+        now = time.time()
+        if (
+            not force
+            and folder_mtime == self._folder_mtime
+            and now - self._last_refresh < self.FULL_REFRESH_INTERVAL
+        ):
+            return False
+        files = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                try:
+                    entry_stat = entry.stat()
+                except OSError:
+                    # might be tidying up in the background
+                    continue
+                if stat.S_ISREG(entry_stat.st_mode):
+                    files[entry.path] = entry_stat
+        self.files = files
+        self._ordered = sorted((-s.st_mtime, p) for p, s in files.items())
+        self._folder_mtime = folder_mtime
+        self._last_refresh = now
+        return True
+
+    def update(self, path: str, path_stat: os.stat_result):
+        """keep the index current with a stat taken elsewhere
+        """
+        old_stat = self.files.get(path)
+        if old_stat is not None:
+            if old_stat.st_mtime == path_stat.st_mtime:
+                self.files[path] = path_stat
+                return
+            self.discard(path)
+        self.files[path] = path_stat
+        bisect.insort(self._ordered, (-path_stat.st_mtime, path))
+
+    def discard(self, path: str):
+        old_stat = self.files.pop(path, None)
+        if old_stat is not None:
+            pos = bisect.bisect_left(self._ordered, (-old_stat.st_mtime, path))
+            if pos < len(self._ordered) and self._ordered[pos][1] == path:
+                del self._ordered[pos]
+
+    def newest_first(self):
+        for _, path in self._ordered:
+            yield path, self.files[path]
+
+
+class PollingBackend:
+    """wakes up every "interval" seconds, the watcher has to find the changes itself
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._wake = threading.Event()
+
+    def add_path(self, path: str):
+        pass
+
+    def wait_for_events(self):
+        self._wake.wait(self.interval)
+        # we don't know what changed
+        return None
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """reports the changes in the watched folders as they happen (Linux only)
+    """
+
+    MASK = IN_MODIFY | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.inotify = Inotify()
+
+    def add_path(self, path: str):
+        self.inotify.add_watch(path, self.MASK)
+
+    def wait_for_events(self):
+        return self.inotify.read_events(self.timeout)
+
+    def wake(self):
+        self.inotify.wake()
+
+    def close(self):
+        self.inotify.close()
+
 
 class FileWatcherThread(QThread):
     file_change = pyqtSignal(str)
     file_removed = pyqtSignal(str)
     FILE_DEFAULT_MAX_AGE = 60 * 60 * 4  # oldest Chatlog-File to scan (4 hours)
+    # with an event based backend, rescan the folders only this often (seconds)
+    FULL_SCAN_INTERVAL = 60
 
-    def __init__(self, folder, scan_interval: float = 0.5):
+    def __init__(self, folder, scan_interval: float = 0.5, backend=None):
         super().__init__()
         self.LOGGER = logging.getLogger(__name__)
         self.LOGGER.debug("Starting FileWatcher-Thread")
@@ -38,13 +176,36 @@ class FileWatcherThread(QThread):
         self.scanInterval = scan_interval
         self.maxFiles = 200
         self.files_in_folder = {}
-        self._add_files(folder)
+        self.directory_index = {}
+        # superseded Log-Files (older sessions), with their mtime when retired
+        self.retired = {}
+        self._retire_queue = Queue()
+        self.backend = backend if backend else self._create_backend()
+        self.add_path(folder)
 
     @property
     def max_age(self):
         return self.FILE_DEFAULT_MAX_AGE
 
+    def _create_backend(self):
+        if inotify_available():
+            try:
+                backend = InotifyBackend(self.FULL_SCAN_INTERVAL)
+                self.LOGGER.debug("FileWatcher using inotify")
+                return backend
+            except OSError as e:
+                self.LOGGER.warning("Unable to use inotify, polling instead: %r", e)
+        return PollingBackend(self.scanInterval)
+
     def add_path(self, path):
+        try:
+            self.backend.add_path(path)
+        except OSError as e:
+            self.LOGGER.warning(
+                'Unable to watch "%s", polling instead: %r', path, e,
+            )
+            self.backend.close()
+            self.backend = PollingBackend(self.scanInterval)
         self._add_files(path)
 
     def start(self, priority: "QThread.Priority" = QThread.NormalPriority) -> None:
@@ -53,26 +214,63 @@ class FileWatcherThread(QThread):
         super().start(priority)
 
     def run(self):
+        last_scan = time.time()
         while self._active:
             # don't overload the disk scanning
-            time.sleep(self.scanInterval)
-            # here, periodically, we check if any files have been added to the folder
-            if self._active:
-                self._scan_paths()
-                for path in self.files_in_folder.keys():  # dict
-                    self.files_in_folder[path] = self._check_changes(
-                        list(self.files_in_folder[path].items())
-                    )
+            events = self.backend.wait_for_events()
+            if not self._active:
+                break
+            self._apply_retired()
+            if events is None:
+                # here, periodically, we check if any files have been added to the folder
+                self._full_scan()
+            else:
+                self._process_events(events)
+                # files still need to age out of tracking
+                if time.time() - last_scan > self.FULL_SCAN_INTERVAL:
+                    self._scan_paths()
+                    last_scan = time.time()
+        self.backend.close()
 
     def quit(self) -> None:
         if self._active:
             self._active = False
             self.LOGGER.debug("Stopping FileWatcher-Thread")
+            self.backend.wake()
             super().quit()
 
     def file_changed(self, path):
         self.file_change.emit(path)
 
+    def retire_file(self, path):
+        """stop tracking a Log-File, which has been superseded by a newer session.
+        It is only picked up again, if it is modified.
+        """
+        # applied by the watcher-thread on its next turn
+        self._retire_queue.put(path)
+
+    def _apply_retired(self):
+        while not self._retire_queue.empty():
+            path = self._retire_queue.get()
+            files_in_dir = self.files_in_folder.get(os.path.dirname(path), {})
+            path_stat = files_in_dir.pop(path, None)
+            if path_stat is None:
+                index = self.directory_index.get(os.path.dirname(path))
+                path_stat = index.files.get(path) if index else None
+            if path_stat is not None:
+                self.LOGGER.debug("retiring superseded File from tracking: %s", path)
+                self.retired[path] = path_stat.st_mtime
+
+    def _is_retired(self, path: str, path_stat: os.stat_result) -> bool:
+        retired_mtime = self.retired.get(path)
+        if retired_mtime is None:
+            return False
+        if path_stat.st_mtime > retired_mtime:
+            # written to again
+            del self.retired[path]
+            return False
+        return True
+
     def remove_file(self, path):
         self.LOGGER.debug(
             "removing old File from tracking (older than %ds): %s",
@@ -90,76 +288,132 @@ class FileWatcherThread(QThread):
         )
         self._warned = True
 
-    def _check_changes(self, check_list):
+    def _check_changes(self, check_list, fresh_stats: dict = None):
+        """
+        :param fresh_stats: stats of the folder enumeration just done, saves the os.stat
+        """
         file_list = {}
+        fresh_stats = fresh_stats or {}
 
         for file, file_stat in check_list:
             # might be tidying up..., so try
             try:
-                path_stat = os.stat(file)
+                path_stat = fresh_stats.get(file)
+                if path_stat is None:
+                    path_stat = os.stat(file)
                 if path_stat != file_stat:
                     self.file_changed(file)
+                    index = self.directory_index.get(os.path.dirname(file))
+                    if index:
+                        index.update(file, path_stat)
                 file_list[file] = path_stat
             except Exception as e:
                 self.LOGGER.warning('File-Stat-Error on "%s": %r', file, e,)
                 pass
         return file_list
 
-    # scan all configured paths
-    def _scan_paths(self):
-        self._add_files(self.folder)
+    def _full_scan(self):
+        fresh_stats = self._scan_paths()
+        for path in self.files_in_folder.keys():  # dict
+            self.files_in_folder[path] = self._check_changes(
+                list(self.files_in_folder[path].items()), fresh_stats
+            )
+
+    def _process_events(self, events: list):
+        changed = []
+        now = time.time()
+        for mask, folder, full_path in events:
+            if full_path is None:
+                # the event-queue overflowed, we may have missed something
+                self.LOGGER.warning("FileWatcher event-queue overflow, rescanning")
+                self._full_scan()
+                continue
+            if mask & IN_ISDIR:
+                continue
+            files_in_dir = self.files_in_folder.setdefault(folder, {})
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self.retired.pop(full_path, None)
+                if full_path in files_in_dir:
+                    del files_in_dir[full_path]
+                    if full_path in changed:
+                        changed.remove(full_path)
+                    self.LOGGER.debug("File no longer in folder: %s", full_path)
+                    self.file_removed.emit(full_path)
+                continue
+            if full_path in files_in_dir:
+                if mask & IN_MODIFY and full_path not in changed:
+                    changed.append(full_path)
+                continue
+            # a file we're not tracking yet
+            try:
+                path_stat = os.stat(full_path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(path_stat.st_mode):
+                continue
+            if self.max_age and (now - path_stat.st_mtime) > self.max_age:
+                continue
+            if self._is_retired(full_path, path_stat):
+                continue
+            files_in_dir[full_path] = path_stat
+            if mask & IN_MODIFY:
+                changed.append(full_path)
+        for full_path in changed:
+            self.file_changed(full_path)
+
+    # scan all configured paths, returns the stats found on the way
+    def _scan_paths(self) -> dict:
+        return self._add_files(self.folder)
 
     # check for new files in folder and add if necessary
-    # TODO: to filter chat-logs which are kept open over a long time, match it to character...
-    #  new log-file for character, close old one
-    def _add_files(self, path: str = None):
+    # superseded sessions of a character are retired by the Chat-Monitor
+    # returns the stats of the enumeration, empty if the folder wasn't enumerated
+    def _add_files(self, path: str = None) -> dict:
         if not path:
             self.LOGGER.warning("No path passed to _addFiles !")
-        files_in_dir = (
-            self.files_in_folder[path]
-            if path and path in self.files_in_folder.keys()
-            else {}
-        )
+            return {}
+        files_in_dir = self.files_in_folder.get(path, {})
+        index = self.directory_index.get(path)
+        if index is None:
+            index = self.directory_index[path] = DirectoryIndex(path)
         changed = False
         now = time.time()
-        # order by date descending
         try:
-            folder_content = sorted(
-                glob.glob(os.path.join(path, "*")), key=os.path.getmtime, reverse=True
-            )
-        except:
+            enumerated = index.refresh()
+        except OSError:
             # might be tidying up in the background
-            folder_content = []
-        if self.maxFiles and len(folder_content) > self.maxFiles:
-            self._send_warning(path, len(folder_content))
-        for fullPath in folder_content:
-            try:
-                path_stat = os.stat(fullPath)
+            enumerated = False
+        if enumerated:
+            if self.maxFiles and len(index) > self.maxFiles:
+                self._send_warning(path, len(index))
+            # order by date descending
+            for fullPath, path_stat in index.newest_first():
+                if self.max_age and (now - path_stat.st_mtime) > self.max_age:
+                    # we now BREAK, since not interested in older files
+                    break
                 # this file currently not logged
-                if fullPath not in files_in_dir:
-                    if not stat.S_ISREG(path_stat.st_mode):
-                        continue
-                    if self.max_age and ((now - path_stat.st_mtime) > self.max_age):
-                        # we now BREAK, since not interested in older files
-                        break
+                if fullPath not in files_in_dir and not self._is_retired(
+                    fullPath, path_stat
+                ):
                     files_in_dir[fullPath] = path_stat
                     changed = True
-                # this file now older than wanted
-                elif self.max_age and (now - path_stat.st_mtime) > self.max_age:
-                    # files_in_dir.pop(fullPath)
+            for fullPath in [p for p in self.retired if p not in index.files]:
+                if os.path.dirname(fullPath) == path:
+                    del self.retired[fullPath]
+        # this file now older than wanted
+        if self.max_age:
+            for fullPath, path_stat in list(files_in_dir.items()):
+                # the index may know of a more recent modification
+                index_stat = index.files.get(fullPath, path_stat)
+                mtime = max(path_stat.st_mtime, index_stat.st_mtime)
+                if (now - mtime) > self.max_age:
                     self.remove_file(fullPath)
                     changed = True
                     del files_in_dir[fullPath]
-            except Exception as e:
-                self.LOGGER.error(
-                    "Trying to remove %s from dictionary %r: %r",
-                    fullPath, files_in_dir,
-                    e,
-                )
-                pass
         if changed:
             self.files_in_folder[path] = files_in_dir
             self.LOGGER.debug(
                 "currently tracking %d files in %s", len(files_in_dir), path,
             )
             self.LOGGER.debug("  %r", self.files_in_folder[path],)
+        return dict(index.files) if enumerated else {}
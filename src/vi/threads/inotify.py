@@ -0,0 +1,132 @@
+#     Vintel - Visual Intel Chat Analyzer
+#     Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        # raises AttributeError if this libc has no inotify
+        _libc.inotify_init1
+        _libc.inotify_add_watch
+    return _libc
+
+
+def inotify_available() -> bool:
+    try:
+        _load_libc()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class Inotify:
+    """minimal ctypes wrapper around the Linux inotify API.
+
+    A self-pipe is used, so a thread blocked in "read_events" can be woken up by "wake".
+    """
+
+    def __init__(self):
+        self.LOGGER = logging.getLogger(__name__)
+        self._libc = _load_libc()
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._wake_read, self._wake_write = os.pipe()
+        self._watches = {}
+        self._closed = False
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        self._watches[wd] = path
+        return wd
+
+    def read_events(self, timeout: float = None) -> list:
+        """wait for events on any of the watches
+
+        :param timeout: seconds to wait at most, None to wait forever
+        :return: list of (mask, watched folder, full path) tuples, empty on timeout or close
+        """
+        if self._closed:
+            return []
+        readable, _, _ = select.select([self.fd, self._wake_read], [], [], timeout)
+        if self.fd not in readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = data[pos : pos + length].rstrip(b"\0")
+            pos += length
+            folder = self._watches.get(wd)
+            if mask & IN_Q_OVERFLOW:
+                events.append((mask, None, None))
+            elif folder is not None:
+                events.append((mask, folder, os.path.join(folder, os.fsdecode(name))))
+        return events
+
+    def wake(self):
+        """stop waiting for events, "read_events" will return immediately from now on
+        """
+        if not self._closed and self._wake_write >= 0:
+            self._closed = True
+            os.write(self._wake_write, b"\0")
+
+    def close(self):
+        """release the file-descriptors, call from the thread reading the events
+        """
+        self._closed = True
+        for fd in (self.fd, self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fd = self._wake_read = self._wake_write = -1
@@ -0,0 +1,59 @@
+#     Vintel - Visual Intel Chat Analyzer
+#     Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import logging
+import queue
+
+from PyQt5.QtCore import QThread
+
+from vi.chat.archiver import LogArchiver
+
+
+class LogArchiverThread(QThread):
+    """periodically moves old chat-logs from the Chatlogs-folder into the archive
+    """
+
+    def __init__(self, folder: str, max_age: int, interval: float = 60 * 60):
+        super().__init__()
+        self.LOGGER = logging.getLogger(__name__)
+        self.LOGGER.debug("Starting LogArchiver-Thread")
+        self._active = False
+        self.interval = interval
+        self.archiver = LogArchiver(folder, max_age)
+        self.queue = queue.Queue(maxsize=1)
+
+    def start(self, priority: "QThread.Priority" = QThread.LowPriority) -> None:
+        self._active = True
+        super().start(priority)
+
+    def run(self):
+        while self._active:
+            try:
+                self.archiver.archive()
+            except Exception as e:
+                self.LOGGER.error("Archiving of chat-logs failed: %r", e)
+            try:
+                self.queue.get(timeout=self.interval)
+            except queue.Empty:
+                pass
+
+    def quit(self):
+        if self._active:
+            self.LOGGER.debug("Stopping LogArchiver-Thread")
+            self._active = False
+            self.queue.put(1)
+            super().quit()
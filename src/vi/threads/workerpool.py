@@ -0,0 +1,129 @@
+#     Vintel - Visual Intel Chat Analyzer
+#     Copyright (c) 2019. Steven Tschache (github@tschache.com)
+#
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.	 See the
+#     GNU General Public License for more details.
+#
+#     You should have received a copy of the GNU General Public License
+#     along with this program.	 If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import itertools
+import logging
+import queue
+import threading
+from collections import Counter, deque
+
+
+class WorkerPool:
+    """fixed number of threads working off a shared task-queue.
+
+    The number of threads does not depend on how much work is submitted.
+    Tasks with a lower priority-number are picked first, tasks of the same
+    priority in submit order.
+    """
+
+    DEFAULT_PRIORITY = 0
+
+    def __init__(self, workers: int = 4, name: str = "Worker"):
+        self.LOGGER = logging.getLogger(__name__)
+        self.queue = queue.PriorityQueue()
+        # keeps the submit order within a priority
+        self._sequence = itertools.count()
+        # waiting tasks by priority
+        self._depths = Counter()
+        self._depths_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(
+                target=self._run, name="{}-{}".format(name, i), daemon=True
+            )
+            for i in range(workers)
+        ]
+        self._active = False
+
+    def start(self):
+        self._active = True
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, *args):
+        self.submit_with_priority(self.DEFAULT_PRIORITY, func, *args)
+
+    def submit_with_priority(self, priority: int, func, *args):
+        if self._active:
+            with self._depths_lock:
+                self._depths[priority] += 1
+            self.queue.put((priority, next(self._sequence), func, args))
+
+    def depths(self) -> dict:
+        """number of tasks waiting, by priority"""
+        with self._depths_lock:
+            return {priority: depth for priority, depth in self._depths.items() if depth}
+
+    def _run(self):
+        while True:
+            priority, _, func, args = self.queue.get()
+            if func is None:
+                return
+            with self._depths_lock:
+                self._depths[priority] -= 1
+            try:
+                func(*args)
+            except Exception as e:
+                self.LOGGER.error("Task %r failed: %r", func, e, exc_info=True)
+
+    def shutdown(self):
+        if self._active:
+            self._active = False
+            # ahead of anything still waiting
+            for _ in self._threads:
+                self.queue.put((-1, next(self._sequence), None, None))
+
+
+class SerialQueue:
+    """runs the submitted tasks on a WorkerPool, one after another, in submit order.
+
+    Only one task of a SerialQueue is in the pool at any time, so its tasks never
+    run concurrently and other queues sharing the pool get their turn in between.
+    They are handed to the pool with the default priority.
+    """
+
+    def __init__(self, pool: WorkerPool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._tasks = deque()
+        self._scheduled = False
+
+    def submit(self, func, *args):
+        with self._lock:
+            self._tasks.append((func, args))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.pool.submit(self._run_next)
+
+    def clear(self):
+        with self._lock:
+            self._tasks.clear()
+
+    def _run_next(self):
+        with self._lock:
+            if not self._tasks:
+                self._scheduled = False
+                return
+            func, args = self._tasks.popleft()
+        try:
+            func(*args)
+        finally:
+            with self._lock:
+                if not self._tasks:
+                    self._scheduled = False
+                    return
+            self.pool.submit(self._run_next)
@@ -48,7 +48,6 @@ from vi.color.helpers import contrast_color, string_to_color
 from vi.dotlan.exception import DotlanException
 from vi.dotlan.mymap import MyMap
 from vi.dotlan.regions import Regions, convert_region_name
-from vi.esi import EsiInterface
 from vi.esi.esihelper import EsiHelper
 from vi.jumpbridge.Import import Import
 from vi.jumpbridge.JumpbridgeDialog import JumpbridgeDialog
@@ -94,6 +93,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.avatarFindThread = None
         self.filewatcherThread = None
         self.chatTidyThread = None
+        self.logArchiverThread = None
         self.statisticsThread = None
         self.versionCheckThread = None
         self.mapUpdateThread = None
@@ -233,6 +233,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             )
         )
         self.knownPlayers[action.text()].setMonitoring(action.isChecked())
+        self.updateWatchedSystems()
 
     # TODO: unknown where is used (Window-Paint?)
     def paintEvent(self, event):
@@ -320,6 +321,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.messageExpiry(GeneralSettings().message_expiry)
             self.enableSelfNotify(GeneralSettings().self_notify)
             self.changeAlarmDistance(GeneralSettings().alarm_distance)
+            self.chatThread.update_batch_interval()
             self.region_menu_update()
             return True
         return False
@@ -363,6 +365,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     def updatePlayers(self, player_list: list):
         self.knownPlayers.add_names(player_list)
         self.updateCharacterMenu()
+        # the one just added is the last
+        EsiHelper().learn_pilots(player_list[-1:])
 
     def setupThreads(self):
         self.LOGGER.debug("Creating threads")
@@ -391,22 +395,31 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         self.chatThread = ChatMonitorThread()
         # self.chatThread = ChatThread(room_names=self.roomnames, ship_parser=self.enableShipParser(), char_parser=self.enableCharacterParser())
-        self.chatThread.message_added_signal.connect(self.logFileChanged)
+        self.chatThread.messages_added_signal.connect(self.logFilesChanged)
         self.chatThread.message_updated_signal.connect(
             self.updateMessageDetailsOnChatEntry
         )
         self.chatThread.player_added_signal.connect(self.updatePlayers)
         self.chatThread.start()
+        # tag our own Characters in chat without asking ESI
+        EsiHelper().learn_pilots(self.knownPlayers.get_names())
 
         self.filewatcherThread = FileWatcherThread(self.pathToLogs)
         self.filewatcherThread.file_change.connect(self.chatThread.add_log_file)
         self.filewatcherThread.file_removed.connect(self.chatThread.remove_log_file)
+        self.chatThread.log_file_retired.connect(self.filewatcherThread.retire_file)
         self.filewatcherThread.start()
 
         self.chatTidyThread = ChatTidyUpThread(self.message_expiry)
         self.chatTidyThread.time_up.connect(self.pruneMessages)
         self.chatTidyThread.start()
 
+        if GeneralSettings().archive_logs:
+            self.logArchiverThread = LogArchiverThread(
+                self.pathToLogs, GeneralSettings().archive_age
+            )
+            self.logArchiverThread.start()
+
         self.statisticsThread = StatisticsThread()
         self.statisticsThread.statistic_data_update.connect(self.updateStatisticsOnMap)
         # statisticsThread is blocked until first call of requestStatistics
@@ -445,7 +458,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.systems = self.dotlan.systems
         self.dotlan_systems.emit(self.systems)
         if self.chatThread:
-            self.chatThread.update_dotlan_systems(self.systems)
+            self.chatThread.update_dotlan_systems(
+                self.systems, self.dotlan.system_index
+            )
+            self.updateWatchedSystems()
 
         # Menus - only once
         if initialize:
@@ -559,6 +575,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.avatarFindThread.quit()
             if self.chatTidyThread:
                 self.chatTidyThread.quit()
+            if self.logArchiverThread:
+                self.logArchiverThread.quit()
             if self.filewatcherThread:
                 self.filewatcherThread.quit()
             # self.kosRequestThread.quit()
@@ -732,6 +750,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             if action.alarmDistance == distance:
                 action.setChecked(True)
         self.trayIcon.alarmDistance = int(distance)
+        self.updateWatchedSystems()
 
     def changeJumpbridgesVisibility(self):
         newValue = self.dotlan.changeJumpbridgesVisibility()
@@ -801,10 +820,26 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if not new_system == "?" and new_system in self.systems:
             self.systems[new_system].addLocatedCharacter(player_name)
             self.knownPlayers[player_name].setLocation(new_system)
+        self.updateWatchedSystems()
         # character location highlight update
         if update_view:
             self.updateMapView()
 
+    def updateWatchedSystems(self):
+        """let the Chat-Thread refine Messages about systems near our active characters first
+        """
+        if not self.chatThread or not self.systems:
+            return
+        watched = set()
+        for character in self.knownPlayers.get_active_names():
+            location = self.knownPlayers[character].getLocation()
+            if location in self.systems:
+                watched.update(
+                    system.name
+                    for system in self.systems[location].getNeighbours(self.alarmDistance)
+                )
+        self.chatThread.set_watched_systems(watched)
+
     def scrollTo(self, x, y):
         self.initialMapPosition = QPointF(x, y)
 
@@ -995,13 +1030,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             webbrowser.open(zKill)
 
     def pruneMessages(self):
-        eve_now = time.mktime(EsiInterface().currentEveTime().timetuple())
+        now = time.time()
         start = self.chatListWidget.count()
         for row in range(start):
             item = self.chatListWidget.item(0)
             widget = self.chatListWidget.itemWidget(item)
             message = self.chatListWidget.itemWidget(item).message
-            diff = eve_now - time.mktime(message.utc_time.timetuple())
+            diff = now - message.timestamp
             try:
                 if int(diff) > int(self.message_expiry):
                     self.chatEntries.remove(widget)
@@ -1086,7 +1121,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             # Alert the User
             pass
 
-    def logFileChanged(self, message: Message):
+    def logFilesChanged(self, messages: list):
+        """a batch of Messages, the Map is only rendered once
+        """
+        for message in messages:
+            self._applyMessage(message)
+        self.updateMapView()
+
+    def _applyMessage(self, message: Message):
         self.LOGGER.debug("Message received: {}".format(message))
         # wait for Map to be completly loaded
         if message.status == State["LOCATION"]:
@@ -1143,5 +1185,3 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                                 self.trayIcon.showNotification(
                                     message, system.name, ", ".join(chars), distance
                                 )
-
-        self.updateMapView()
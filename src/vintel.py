@@ -20,6 +20,7 @@
 
 import ftplib
 import logging
+import multiprocessing
 import os
 import sys
 import time
@@ -52,7 +53,7 @@ class MyMainException(Exception):
 class Application(QApplication):
     def __init__(self, args):
         super(Application, self).__init__(args)
-        self.LOGGER = logging.getLogger(__name__)
+        self.LOGGER = logging.getLogger(PROGNAME)
         self.backGroundColor = "#ffffff"
         self.splash = None
         self.vintelCache = None
@@ -144,7 +145,6 @@ class Application(QApplication):
         self.splash.finish(self.mainWindow)
 
 
-__name__ = PROGNAME
 __author__ = AUTHOR + " (" + AUTHOR_EMAIL + ")"
 __version__ = VERSION
 
@@ -180,8 +180,11 @@ def main_exception_hook(exceptionType, exceptionValue, tracebackObject):
 
 # sys.excepthook = main_exception_hook
 
-app = Application(sys.argv)
-app.configure()
-app.startup()
-result = app.exec_()
-# sys.exit(result)
+if __name__ == "__main__":
+    # the backlog of the chat-logs is parsed in child-processes
+    multiprocessing.freeze_support()
+    app = Application(sys.argv)
+    app.configure()
+    app.startup()
+    result = app.exec_()
+    # sys.exit(result)